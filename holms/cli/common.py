@@ -12,12 +12,24 @@ import pytermor as pt
 class MultiChoice(click.Choice):
     def __init__(
         self,
-        choices: t.Sequence[str],
+        choices: t.Sequence[str] | t.Callable[[], t.Sequence[str]],
         case_sensitive: bool = True,
         hide_choices: bool = False,
     ) -> None:
         self._hide_choices = hide_choices
-        super().__init__(choices, case_sensitive)
+        self._get_choices = choices if callable(choices) else None
+        super().__init__(None if callable(choices) else choices, case_sensitive)
+
+    @property
+    def choices(self) -> t.Sequence[str]:
+        # can be loaded on first use, e.g. when the list comes from the database
+        if self._choices is None:
+            self._choices = self._get_choices()
+        return self._choices
+
+    @choices.setter
+    def choices(self, value: t.Sequence[str] | None):
+        self._choices = value
 
     def convert(self, value: t.Any, *args, **kwargs) -> t.Any:
         return [super(MultiChoice, self).convert(v, *args, **kwargs) for v in value.split(",")]
@@ -33,6 +45,21 @@ class HiddenIntRange(click.IntRange):
         return ""
 
 
+class CodePointRange(click.ParamType):
+    name = "range"
+
+    def convert(self, value: t.Any, param: click.Parameter | None, ctx: click.Context | None) -> tuple[int, int]:
+        if isinstance(value, tuple):
+            return value
+        try:
+            start, end = (int(v.strip().upper().removeprefix("U+").removeprefix("0X"), 16) for v in value.split("-"))
+        except ValueError:
+            self.fail(f"{value!r} is not a valid code point range (expected 'U+XXXX-U+YYYY')", param, ctx)
+        if start > end:
+            self.fail(f"{value!r}: range start is greater than the end", param, ctx)
+        return start, end
+
+
 class Formatter(click.HelpFormatter):
     def write_dl(self, rows, col_max: int = 20, col_spacing: int = 2) -> None:
         super().write_dl(rows, col_max, col_spacing)
@@ -3,16 +3,17 @@
 #  (c) 2023 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
 import time
+import typing as t
 
 import click
 import pytermor as pt
 
 from holms import APP_NAME
-from holms.cmd import invoke_run, invoke_version, LegendCommand, invoke_format, invoke_path
-from holms.core import Attribute
-from .common import MultiChoice, HiddenIntRange, Context, CliGroup, CliCommand
-from holms.shared import logger
+from holms.core.attr import Attribute, OutputFormat
+from .common import MultiChoice, HiddenIntRange, CodePointRange, Context, CliGroup, CliCommand
+from holms.shared import logger, profiler
 from holms.shared.log import init_log, destroy_log
+from holms.shared.perf import init_profile, destroy_profile
 
 
 def entrypoint_fn(*args, **kwargs):
@@ -28,8 +29,15 @@ def entrypoint_fn(*args, **kwargs):
     _destroy_io()
 
 
-def _init_io(color: bool | None, verbose: int = 0, **kwargs):
+def _init_io(color: bool | None, verbose: int = 0, profile: bool = False, profile_out: str = None, **kwargs):
     init_log(verbose)
+    init_profile(profile or verbose > 1, profile_out)
+    if prof := profiler():
+        # on context teardown rather than in entrypoint_fn, which
+        # is not reached when click exits, or with the test runner
+        ctx = click.get_current_context()
+        ctx.call_on_close(destroy_profile)
+        ctx.call_on_close(prof.report)  # callbacks are called in reverse order
     if color is not None:
         output_mode = [pt.OutputMode.NO_ANSI, pt.OutputMode.XTERM_256][color]
         pt.ConfigManager.get().force_output_mode = output_mode
@@ -37,9 +45,64 @@ def _init_io(color: bool | None, verbose: int = 0, **kwargs):
 
 def _destroy_io():
     pt.ConfigManager.get().force_output_mode = ""
+    destroy_profile()
     destroy_log()
 
 
+def _get_category_choices() -> list[str]:
+    from holms.db import get_categories
+
+    return sorted({cat.abbr for cat in get_categories()})
+
+
+def _get_block_choices() -> list[str]:
+    from holms.db import get_blocks
+
+    return [*{b.abbr for b in get_blocks()}, *{b.name for b in get_blocks()}]
+
+
+def _filter_options(fn: t.Callable) -> t.Callable:
+    options = [
+        click.option(
+            "--only-cat",
+            "only_cats",
+            type=MultiChoice(_get_category_choices, hide_choices=True),
+            metavar="CAT,...",
+            help="Display only the characters of specified categories, e.g. 'Cf,Co,Cn' (run 'holms legend' to see "
+            "the list). Super categories ('C', 'L' etc.) are also accepted. Offsets and indexes of the characters "
+            "stay true.",
+        ),
+        click.option(
+            "--only-block",
+            "only_blocks",
+            type=MultiChoice(_get_block_choices, hide_choices=True),
+            metavar="BLOCK,...",
+            help="Display only the characters of specified Unicode blocks; both block names ('Basic Latin') and "
+            "abbreviations ('BaL') can be used.",
+        ),
+        click.option(
+            "--range",
+            "cp_range",
+            type=CodePointRange(),
+            metavar="U+XXXX-U+YYYY",
+            help="Display only the characters with code points within the specified (inclusive) range.",
+        ),
+        click.option(
+            "--exclude-ascii",
+            is_flag=True,
+            help="Do not display 7-bit ASCII characters (U+00-U+7F).",
+        ),
+        click.option(
+            "--invalid-only",
+            is_flag=True,
+            help="Display only the bytes which are not valid UTF-8 sequences.",
+        ),
+    ]
+    for option in reversed(options):
+        fn = option(fn)
+    return fn
+
+
 @click.command(
     cls=CliCommand,
     short_help="break input down to unicode codepoints",
@@ -58,8 +121,10 @@ def _destroy_io():
     "\n\n"
     "Unbuffered mode comes in handy when input is an endless piped stream: the results will be shown in "
     "real time, as soon as the type of each byte sequence is determined, but the output columns are dynamic "
-    "and can expand as the process goes further. Strictly speaking, this mode is also buffered, but the buffer "
-    "has a minimum possible size for working with UTF-8 encoded data (4 bytes).",
+    "and can expand as the process goes further. Each read returns as soon as any data is available (up to 8 KiB "
+    "at once), and the input is being read while the previous parts are processed and written, so that bursts "
+    "of data are handled in larger steps. With '--follow' the app keeps waiting for the data to be appended to "
+    "the INPUT file.",
 )
 @click.argument(
     "input",
@@ -74,6 +139,22 @@ def _destroy_io():
     help="Explicitly set to wait for EOF before processing the output (buffered), or to stream the results in parallel "
     "with reading, as soon as possible (unbuffered). See BUFFERING section above for the details.",
 )
+@click.option(
+    "--buffer-limit",
+    type=click.IntRange(0),
+    default=256,
+    metavar="MB",
+    help="Amount of memory the buffered mode can use to keep the rows when INPUT is not seekable (e.g., a pipe); "
+    "the rest is temporarily stored on disk. Set to 0 to keep everything in memory. [default: 256]",
+)
+@click.option(
+    "-F",
+    "--follow",
+    is_flag=True,
+    help="Do not stop at the end of INPUT file, but keep waiting for the data to be appended, like 'tail -f' "
+    "does, until interrupted. Implies '-u', cannot be combined with '-g'. Has no effect if INPUT is not a "
+    "regular file.",
+)
 @click.option(
     "-m",
     "--merge",
@@ -93,6 +174,37 @@ def _destroy_io():
     "results in grouping by code point category instead, while doing it thrice ('-ggg') makes the app "
     "group the input by super categories.",
 )
+@click.option(
+    "--top",
+    type=click.IntRange(0),
+    default=0,
+    metavar="N",
+    help="Display only N most frequent groups ('-g'), the rest are aggregated into one 'others' row. "
+    "Set to 0 to display all of them. [default: 0]",
+)
+@click.option(
+    "--min-count",
+    type=click.IntRange(0),
+    default=0,
+    metavar="N",
+    help="Aggregate the groups ('-g') which occur less than N times into 'others' row.",
+)
+@click.option(
+    "--min-ratio",
+    type=click.FloatRange(0, 100),
+    default=0.0,
+    metavar="PCT",
+    help="Aggregate the groups ('-g') which make less than PCT percent of the input into 'others' row.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(0),
+    default=1,
+    help="Number of worker processes to split the grouping ('-g') of INPUT file between. Set to 0 to use all "
+    "available CPUs. Applies only to regular files; the result is the same as of a single process.",
+)
+@_filter_options
 @click.option(
     "-f",
     "--format",
@@ -149,25 +261,157 @@ def _destroy_io():
     help="Do not format results as a table, just apply the colors to characters (equivalent to '-f char', implies "
     "'-b'). Compatible with '-merge', '--format' and even '--group'. ",
 )
+@click.option(
+    "-O",
+    "--output-format",
+    type=click.Choice(OutputFormat.list()),
+    default=OutputFormat.TABLE.value,
+    help="Output format: 'table' is the default colored one, the others are machine-readable and contain raw "
+    "values of the columns selected with '-f' (except 'binary', which consists of fixed-size records of offset, "
+    "index, count and code point). Machine-readable formats imply '-u' (unless grouping).",
+)
 @click.option(
     "--no-override",
     is_flag=True,
     help="Do not replace control/whitespace code point markers with distinguishable characters ('▯' to '↵', '␣' etc). "
     "Run 'holms legend' to see the details.",
 )
-def run(**kwargs):
+@click.option(
+    "--via-socket",
+    is_flag=False,
+    flag_value="",
+    envvar="HOLMS_SOCKET",
+    metavar="PATH",
+    help="Do not process the INPUT in this process, but forward it to 'holms serve' instance listening on "
+    "Unix socket PATH (or the default one, if PATH is omitted) and display the results. Can also be set "
+    "with HOLMS_SOCKET environment variable.",
+)
+def run(via_socket: str | None, **kwargs):
+    if via_socket is not None:
+        from holms.cmd.run import invoke_run_via_socket
+
+        invoke_run_via_socket(via_socket, **kwargs)
+        return
+
+    from holms.cmd.run import invoke_run
+
     invoke_run(**kwargs)
 
 
+@click.command(
+    cls=CliCommand,
+    short_help="scan multiple files and directories",
+    help="Read all files specified as PATHs, descending into directories recursively, and display the code points "
+    "of each of them as 'run' command does in buffered mode, prefixed with file path; then display a summary of "
+    "all the files, grouped like with 'run -g'. Usually combined with filters, e.g. '--only-cat Cf,Co,Cn' "
+    "for finding invisible and bidirectional control characters in a source tree.",
+)
+@click.argument(
+    "paths",
+    type=click.Path(exists=True, dir_okay=True, readable=True),
+    nargs=-1,
+    required=True,
+)
+@click.option(
+    "-i",
+    "--ignore",
+    multiple=True,
+    metavar="GLOB",
+    help="Skip files and directories matching GLOB (either by name or by path); can be specified multiple times. "
+    "VCS directories (.git, .hg, .svn) and __pycache__ are always skipped.",
+)
+@click.option(
+    "--binary",
+    is_flag=True,
+    help="Do not skip binary files (i.e., the ones with a NUL byte within the first 8K) found in directories.",
+)
+@click.option(
+    "-j",
+    "--jobs",
+    type=click.IntRange(0),
+    default=0,
+    help="Number of worker processes to process the files with. Set to 0 to use all available CPUs. [default: 0]",
+)
+@click.option(
+    "-m",
+    "--merge",
+    "_merge",
+    is_flag=True,
+    help="Replace all sequences of repeating characters with one of each.",
+)
+@click.option(
+    "-g",
+    "--group",
+    "group_level",
+    count=True,
+    type=HiddenIntRange(0, 3, clamp=True),
+    help="Group the summary by code point category ('-gg') or super category ('-ggg') instead of code points.",
+)
+@click.option(
+    "--no-summary",
+    is_flag=True,
+    help="Do not display the summary.",
+)
+@_filter_options
+@click.option(
+    "-f",
+    "--format",
+    "_columns",
+    type=MultiChoice(Attribute.list(), hide_choices=True),
+    help="Comma-separated list of columns to show (order is preserved). Run 'holms format' to see the details.",
+)
+@click.option(
+    "--decimal",
+    "decimal_offset",
+    is_flag=True,
+    help="Use decimal byte offsets instead of hexadecimal.",
+)
+@click.option(
+    "-O",
+    "--output-format",
+    type=click.Choice([f for f in OutputFormat.list() if f != OutputFormat.BINARY]),
+    default=OutputFormat.TABLE.value,
+    help="Output format, see 'run' command. With machine-readable formats the summary is printed to stderr.",
+)
+def scan(**kwargs):
+    from holms.cmd.scan import invoke_scan
+
+    invoke_scan(**kwargs)
+
+
+@click.command(
+    cls=CliCommand,
+    short_help="process 'run' requests from a socket",
+    help="Listen on Unix socket and process the requests from 'run --via-socket' commands, until terminated. "
+    "Allows to pay the startup costs once instead of per each input, which matters when there are lots "
+    "of small ones. The requests are processed one at a time.",
+)
+@click.option(
+    "-s",
+    "--socket",
+    metavar="PATH",
+    help="Path to the socket to listen on. [default: $XDG_RUNTIME_DIR/holms-$UID.sock, or in /tmp if "
+    "XDG_RUNTIME_DIR is not set]",
+)
+def serve(**kwargs):
+    from holms.cmd.serve import invoke_serve
+
+    invoke_serve(**kwargs)
+
+
 @click.command(cls=CliCommand, short_help="show code point category chromacoding details")
 def legend(**kwargs):
     """Show details on code point category chromacoding."""
+    from holms.cmd.legend import LegendCommand
+
     LegendCommand(**kwargs)
 
 
 @click.command(cls=CliCommand, short_help="show column names and format details")
 def format(**kwargs):
     """Show format details and output column names."""
+    from holms.cmd.format import invoke_format
+
     invoke_format(**kwargs)
 
 
@@ -175,19 +419,23 @@ def format(**kwargs):
 @click.option("-s", "--short", is_flag=True, help="Display the version number only.")
 def version(short: bool, **kwargs):
     """Show application version."""
+    from holms.cmd.version import invoke_version
+
     invoke_version(short, **kwargs)
 
 
 @click.command(cls=CliCommand, short_help="show application paths")
 def path(**kwargs):
     """Show application paths."""
+    from holms.cmd.path import invoke_path
+
     invoke_path(**kwargs)
 
 
 @click.group(
     name="cli",
     cls=CliGroup,
-    commands=[run, version, format, legend, path],
+    commands=[run, scan, serve, version, format, legend, path],
     context_settings=Context.DEFAULT_SETTINGS,
 )
 @click.option(
@@ -204,8 +452,24 @@ def path(**kwargs):
     "-v",
     "--verbose",
     count=True,
-    type=HiddenIntRange(0, 1, clamp=True),
-    help=f"Display additional information about what is going on. ",
+    type=HiddenIntRange(0, 2, clamp=True),
+    help=f"Display additional information about what is going on. Can be specified twice ('-vv') to enable "
+    "'--profile' as well.",
+)
+@click.option(
+    "--profile",
+    is_flag=True,
+    help="Measure the time spent and the number of items processed at each stage (reading, decoding, making the "
+    "characters, grouping, computing column widths, rendering and output), and print the summary along with the "
+    "throughput, peak memory usage and cache efficiency to stderr when done.",
+)
+@click.option(
+    "--profile-out",
+    type=click.Path(dir_okay=False, writable=True),
+    metavar="FILE",
+    help="Record the whole run with a profiler and save the results to FILE: in collapsed stacks format for flame "
+    "graph generators if FILE ends with '.folded' or '.collapsed', and as cProfile statistics (for 'pstats', "
+    "'snakeviz' etc.) otherwise. Implies '--profile'.",
 )
 def entrypoint__(**kwargs):
     _init_io(**kwargs)
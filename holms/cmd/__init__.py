@@ -2,8 +2,38 @@
 #  es7s/holms
 #  (c) 2024 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
-from .format import invoke_format
-from .legend import LegendCommand
-from .path import invoke_path
-from .run import invoke_run
-from .version import invoke_version
+"""
+Each command module is imported only when the command is invoked
+(see `holms.core` for the details).
+"""
+import importlib
+import typing as t
+
+_EXPORTS = {
+    "invoke_format": ".format",
+    "LegendCommand": ".legend",
+    "invoke_path": ".path",
+    "invoke_run": ".run",
+    "invoke_scan": ".scan",
+    "invoke_serve": ".serve",
+    "invoke_version": ".version",
+}
+
+if t.TYPE_CHECKING:
+    from .format import invoke_format
+    from .legend import LegendCommand
+    from .path import invoke_path
+    from .run import invoke_run
+    from .scan import invoke_scan
+    from .serve import invoke_serve
+    from .version import invoke_version
+
+
+def __getattr__(name: str) -> t.Any:
+    if module := _EXPORTS.get(name):
+        return getattr(importlib.import_module(module, __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *_EXPORTS]
@@ -4,7 +4,6 @@
 # ------------------------------------------------------------------------------
 import io
 import sys
-import unicodedata
 from collections.abc import Iterable
 from dataclasses import asdict
 from functools import partial
@@ -27,6 +26,7 @@ class LegendCommand:
         self._buffer = io.StringIO()
         self._echo = partial(pt.echo, file=self._buffer)
         self._ctx = ctx
+        self._templates: dict[int, str] = dict()
         self._opts = Options(
             _columns=[
                 Attribute.CAT,
@@ -56,28 +56,20 @@ class LegendCommand:
         pt.echo(file=sys.stdout)
 
     def _print_blocks(self, **kwargs):
-        from holms.db import get_blocks
+        from holms.db import get_blocks, get_block_stats
 
         letter_cats = {"Lu", "Ll"}
 
         self._echo_header("UNICODE BLOCKS")
-        for b in get_blocks():
-            cats = set()
-            cats_full = dict()
-            assigned = 0
-            total = b.end + 1 - b.start
-
-            for i in range(b.start, b.end + 1):
-                cat = unicodedata.category(chr(i))
-                if cat != "Cn":
-                    assigned += 1
-                    cats.add(cat[0])
-                    cats_full[cat[0]] = cat
+        for b, stats in zip(get_blocks(), get_block_stats()):
+            cats = set(stats.cats.keys())
+            cats_full = stats.cats
             if all(lc in cats for lc in letter_cats):
                 cats -= {*letter_cats, "Lo"}
                 cats.add("LC")
 
-            unassigned = total - assigned
+            assigned = stats.assigned
+            unassigned = stats.unassigned
             has_assigned = assigned > 0
 
             gap = pt.pad(2)
@@ -94,7 +86,25 @@ class LegendCommand:
                 gap,
                 *self._format_supercats(cats, cats_full),
             ]
-            self._echo(pt.Text(*row))
+            self._echo(self._render_row(row))
+
+    def _render_row(self, parts: Iterable[pt.Fragment | str]) -> str:
+        """
+        Same as rendering `pt.Text(*parts)`, but each style is rendered only
+        once, as a '%s' template, instead of once per every fragment (there
+        are thousands of them in the blocks section).
+        """
+        result = []
+        for part in parts:
+            if isinstance(part, str):
+                result.append(part)
+                continue
+            if not (string := part.raw()):
+                continue
+            if (template := self._templates.get(id(part.style))) is None:
+                template = self._templates[id(part.style)] = pt.render("%s", part.style)
+            result.append(template % string)
+        return "".join(result)
 
     @classmethod
     def _render_block(cls, block: UnicodeBlock, has_assigned: bool):
@@ -3,44 +3,139 @@
 #  (c) 2023 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
 import io
+import os
 import sys
 from io import UnsupportedOperation
 from pty import STDIN_FILENO
 
-from holms.core import Char, Options
+import click
+import pytermor as pt
+
+from holms.core import Options, OutputFormat
 from holms.core.writer import RunStats
-from holms.shared import logger
+from holms.shared import logger, profiler
 
 
 def invoke_run(
     buffered: bool,
     input: io.BufferedReader,
     output: io.BufferedWriter = None,
+    follow: bool = False,
     **kwargs,
 ) -> RunStats:
     if input is None:
         input = sys.stdin.buffer
-
-    if buffered is None:
-        try:
-            buffered = input.fileno() != STDIN_FILENO
-        except UnsupportedOperation:
-            pass  # looks like input is not a fp => its probably testing environment
-        if kwargs.get('no_table', None):
-            buffered = False
+    buffered = _resolve_buffered(buffered, input, **kwargs)
 
     opt = Options(**kwargs)
+    if opt.output_format != OutputFormat.TABLE or follow:
+        buffered = False  # no column widths to compute
     if opt.group:
+        if follow:
+            raise click.UsageError("Option '--follow' cannot be combined with '--group'")
         buffered = True
 
+    if not buffered:
+        from holms.core.stream import StreamPipeline
+
+        stats = StreamPipeline(opt, input, output, follow).run()
+        logger().info(f"Processed {stats.proc_bytes} bytes, {stats.proc_chars} chars")
+        return stats
+
     from holms.core.reader import CliReader
     from holms.core.writer import CliWriter
 
-    r = CliReader(opt, io.TextIOWrapper(input))
     w = CliWriter(opt, buffered, output)
 
-    chars = Char.parse(r.read())
-    stats = w.write(chars)
+    if path := _get_parallel_path(opt, input):
+        from holms.core.parallel import count_parallel
+
+        stats = w.write_groups(count_parallel(path, opt))
+        input.close()
+    else:
+        r = CliReader(opt, io.TextIOWrapper(input))
+        if opt.group:
+            from holms.core.counter import count_runs
+
+            if prof := profiler():
+                count_runs = prof.wrap("group", count_runs, lambda result: result[2].proc_chars)
+            stats = w.write_groups([count_runs(r.read_runs(), opt)])
+        elif r.is_rewindable():
+
+            def _read():
+                r.rewind()
+                return r.parse()
+
+            stats = w.write_two_pass(_read)
+        else:
+            stats = w.write(r.parse())
+        r.close()
     logger().info(f"Processed {stats.proc_bytes} bytes, {stats.proc_chars} chars")
 
     return stats
+
+
+def invoke_run_via_socket(
+    via_socket: str,
+    buffered: bool,
+    input: io.BufferedReader,
+    output: io.BufferedWriter = None,
+    **kwargs,
+):
+    """
+    Forward the request to 'holms serve' instance listening on `via_socket`
+    (or the default socket path if empty). Buffering mode and output mode
+    are determined here, as they depend on the client's streams.
+    """
+    from holms.core.server import get_default_socket_path, send_request
+
+    if input is None:
+        input = sys.stdin.buffer
+    buffered = bool(_resolve_buffered(buffered, input, **kwargs))  # server's input is never stdin
+    if kwargs.get("cp_range"):
+        kwargs["cp_range"] = [*kwargs["cp_range"]]
+
+    path = via_socket or get_default_socket_path()
+    try:
+        exit_code = send_request(
+            path,
+            kwargs,
+            buffered,
+            _get_output_mode(pt.RendererManager.get()).value,
+            input,
+            output or sys.stdout.buffer,
+        )
+    except (FileNotFoundError, ConnectionRefusedError) as e:
+        raise click.ClickException(f"Server is not running at {path}: {e.strerror}") from e
+    if exit_code:
+        raise click.exceptions.Exit(exit_code)
+
+
+def _resolve_buffered(buffered: bool | None, input: io.BufferedReader, **kwargs) -> bool | None:
+    if buffered is None:
+        try:
+            buffered = input.fileno() != STDIN_FILENO
+        except UnsupportedOperation:
+            pass  # looks like input is not a fp => its probably testing environment
+        if kwargs.get('no_table', None):
+            buffered = False
+    return buffered
+
+
+def _get_output_mode(renderer: pt.IRenderer) -> pt.OutputMode:
+    if not renderer.is_format_allowed:
+        return pt.OutputMode.NO_ANSI
+    if renderer.is_true_color_supported():
+        return pt.OutputMode.TRUE_COLOR
+    if renderer.is_256_color_supported():
+        return pt.OutputMode.XTERM_256
+    return pt.OutputMode.XTERM_16
+
+
+def _get_parallel_path(opt: Options, input: io.BufferedReader) -> str | None:
+    if not opt.group or opt.jobs == 1:
+        return None
+    path = getattr(input, "name", None)
+    if isinstance(path, str) and os.path.isfile(path):
+        return path
+    return None
@@ -0,0 +1,82 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import csv
+import dataclasses
+import io
+import json
+import sys
+
+import pytermor as pt
+
+from holms.core import Options, OutputFormat
+from holms.core.writer import RunStats
+from holms.shared import logger
+
+_PATH_STYLE = pt.FrozenStyle(fg=pt.cv.MAGENTA)
+
+
+def invoke_scan(
+    paths: tuple[str, ...],
+    ignore: tuple[str, ...],
+    binary: bool,
+    no_summary: bool,
+    output: io.TextIOBase = None,
+    **kwargs,
+) -> RunStats:
+    from holms.core.scan import DEFAULT_IGNORE, scan, walk
+    from holms.core.writer import CliWriter
+
+    output = output or sys.stdout
+    opt = Options(**kwargs)
+    files = walk(paths, (*DEFAULT_IGNORE, *ignore), skip_binary=not binary)
+
+    parts = []
+    header_written = False
+    for result in scan(files, opt):
+        parts.append(result.counted)
+        if not result.output:
+            continue
+        lines = result.output.splitlines()
+        if opt.output_format in (OutputFormat.CSV, OutputFormat.TSV):
+            header, *lines = lines
+            if not header_written:
+                output.write(_prefix_csv(opt, "path", header))
+                header_written = True
+        output.writelines(_prefix(opt, result.path, line) for line in lines)
+    output.flush()
+
+    num_files = len(parts)
+    if no_summary:
+        stats = RunStats()
+        for *_, part_stats in parts:
+            stats.proc_bytes += part_stats.proc_bytes
+            stats.proc_chars += part_stats.proc_chars
+    else:
+        summary_output = output if opt.output_format == OutputFormat.TABLE else sys.stderr
+        summary_opt = dataclasses.replace(
+            opt,
+            group_level=max(1, opt.group_level),
+            output_format=OutputFormat.TABLE,
+            _columns=[],
+        )
+        pt.echo(f"\nSummary ({num_files} file{'s' if num_files != 1 else ''}):", file=summary_output)
+        stats = CliWriter(summary_opt, True, summary_output).write_groups(parts)
+    logger().info(f"Processed {num_files} files, {stats.proc_bytes} bytes, {stats.proc_chars} chars")
+    return stats
+
+
+def _prefix(opt: Options, path: str, line: str) -> str:
+    if opt.output_format == OutputFormat.NDJSON:
+        return f'{{"path": {json.dumps(path, ensure_ascii=False)}, {line[1:]}\n'
+    if opt.output_format in (OutputFormat.CSV, OutputFormat.TSV):
+        return _prefix_csv(opt, path, line)
+    return pt.render(path, _PATH_STYLE) + ":" + line + "\n"
+
+
+def _prefix_csv(opt: Options, value: str, line: str) -> str:
+    buf = io.StringIO()
+    dialect = csv.excel_tab if opt.output_format == OutputFormat.TSV else csv.excel
+    csv.writer(buf, dialect, lineterminator="").writerow([value])
+    return buf.getvalue() + dialect.delimiter + line + "\n"
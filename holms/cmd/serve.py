@@ -0,0 +1,30 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import signal
+import sys
+
+import click
+
+from holms.shared import logger
+
+
+def invoke_serve(socket: str | None, **kwargs):
+    from holms.core.server import Server, get_default_socket_path
+
+    path = socket or get_default_socket_path()
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    try:
+        server = Server(path)
+    except OSError as e:
+        raise click.ClickException(f"Failed to listen on {path}: {e.strerror}") from e
+
+    with server:
+        logger().info(f"Listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    logger().info(f"Stopped listening on {path}")
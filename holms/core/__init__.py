@@ -2,10 +2,43 @@
 #  es7s/holms
 #  (c) 2024 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
-from .char import Char
-from .char import Groups
-from .attr import Attribute
-from .opt import Options
-from .cats import OVERRIDE_CHARS
-from .cats import CharOverride
-from .cats import resolve_cat_style
+"""
+The names are exported lazily (PEP 562), so that importing one of the
+submodules, e.g. `holms.core.attr` from CLI definitions, does not load the
+whole package.
+"""
+import importlib
+import typing as t
+
+_EXPORTS = {
+    "Char": ".char",
+    "Groups": ".char",
+    "get_char": ".char",
+    "Attribute": ".attr",
+    "OutputFormat": ".attr",
+    "Options": ".opt",
+    "OVERRIDE_CHARS": ".cats",
+    "CharOverride": ".cats",
+    "resolve_cat_style": ".cats",
+}
+
+if t.TYPE_CHECKING:
+    from .char import Char
+    from .char import Groups
+    from .char import get_char
+    from .attr import Attribute
+    from .attr import OutputFormat
+    from .opt import Options
+    from .cats import OVERRIDE_CHARS
+    from .cats import CharOverride
+    from .cats import resolve_cat_style
+
+
+def __getattr__(name: str) -> t.Any:
+    if module := _EXPORTS.get(name):
+        return getattr(importlib.import_module(module, __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return [*globals(), *_EXPORTS]
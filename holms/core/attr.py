@@ -15,3 +15,11 @@ class Attribute(str, pt.ExtendedEnum):
     CAT = "cat"
     NAME = "name"
     BLOCK = "block"
+
+
+class OutputFormat(str, pt.ExtendedEnum):
+    TABLE = "table"
+    NDJSON = "ndjson"
+    CSV = "csv"
+    TSV = "tsv"
+    BINARY = "binary"
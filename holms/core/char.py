@@ -2,58 +2,147 @@
 #  es7s/holms
 #  (c) 2023-2024 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
+import heapq
+import re
 import unicodedata
 from collections.abc import Iterable, Iterator
-from functools import cached_property
+from dataclasses import dataclass
+from functools import cached_property, lru_cache, partial
 
 import pytermor as pt
 import typing as t
 
-from holms.db import resolve_ascii_cc, find_block, UnicodeBlock
+from holms.db import resolve_ascii_cc, UnicodeBlock
+from holms.db.ucprop import CpFlag, get_props, unpack_block, unpack_category, unpack_flags
 
 _CT = t.TypeVar("_CT", str, bytes)
 
+CHAR_POOL_SIZE = 4096
+
+_REPEAT_REGEX = re.compile(r"(.)\1+", re.DOTALL)
+
 
 class Char(t.Generic[_CT]):
+    """
+    Immutable and slotted: all the attributes are computed on init, as the
+    instances are shared and each of them ends up being queried for most of
+    them anyway (see `get_char()`).
+    """
+
     NO_VALUE = "--"
 
-    _ASCII_C0 = [*range(0x00, 0x20), 0x7F]
-    _ASCII_C1 = [*range(0x80, 0xA0)]
-    _ASCII_LETTERS = [*pt.char_range("A", "Z"), *pt.char_range("a", "z")]
+    __slots__ = (
+        "value",
+        "bytelen",
+        "bytes",
+        "cpnum",
+        "cat",
+        "block",
+        "name",
+        "decomposition",
+        "is_invalid",
+        "is_surrogate",
+        "is_control_or_format",
+        "is_private_use",
+        "is_unassigned",
+        "is_ascii_c0",
+        "is_ascii_c1",
+        "is_ascii_cc",
+        "is_ascii_letter",
+        "is_combining",
+        "should_print_placeholder",
+        "_hash",
+    )
 
     @staticmethod
     def parse(string: Iterable[t.AnyStr | int]) -> Iterator[t.Optional["Char"]]:
-        yield from map(Char, string)
+        yield from map(get_char, string)
+        yield None
+
+    @staticmethod
+    def parse_repeats(runs: Iterable[t.AnyStr]) -> Iterator[t.Union["Char", "Repeat", None]]:
+        """
+        Same as `parse()`, but operates on the output of `CliReader.read_runs()`
+        and replaces each sequence of identical characters with a `Repeat`,
+        which is found in the decoded string, so the sequence costs one
+        instance lookup instead of one per character.
+        """
+        for run in runs:
+            if isinstance(run, bytes):
+                yield from map(get_char, run)  # invalid bytes come one per run
+                continue
+            pos = 0
+            for m in _REPEAT_REGEX.finditer(run):
+                start, end = m.span()
+                if start > pos:
+                    yield from map(get_char, run[pos:start])
+                yield Repeat(get_char(m.group(1)), end - start)
+                pos = end
+            yield from map(get_char, run[pos:])
         yield None
 
     def __init__(self, c: _CT):
         if isinstance(c, int):
             c = bytes((c,))
-            self._bytelen = 1
 
         if len(c) > 1:
             raise ValueError(f"Input must be exactly 1 char long (got {len(c)})")
 
-        if not isinstance(c, bytes):
-            self._bytelen = len(c.encode(errors="surrogatepass"))
-        else:
-            self._bytelen = len(c)
+        _set = partial(object.__setattr__, self)
+        _set("value", c)
+        _set("_hash", hash((c, self.__class__.__name__)))
 
-        self._value: _CT = c
+        is_invalid = isinstance(c, bytes)
+        _set("is_invalid", is_invalid)
+        _set("bytes", c if is_invalid else c.encode(errors="surrogatepass"))
+        _set("bytelen", len(self.bytes))
+        _set("cpnum", ord(c))
+
+        if is_invalid:
+            cat, block, flags = self.NO_VALUE, None, CpFlag(0)
+        else:
+            props = get_props(self.cpnum)
+            cat, block, flags = unpack_category(props), unpack_block(props), unpack_flags(props)
+        _set("cat", cat)
+        _set("block", block)
+        _set("decomposition", None if is_invalid else unicodedata.decomposition(c))
+
+        _set("is_surrogate", CpFlag.SURROGATE in flags)
+        _set("is_control_or_format", CpFlag.CONTROL_OR_FORMAT in flags)
+        _set("is_private_use", CpFlag.PRIVATE_USE in flags)
+        _set("is_unassigned", CpFlag.UNASSIGNED in flags)
+        _set("is_ascii_c0", CpFlag.ASCII_C0 in flags)
+        _set("is_ascii_c1", CpFlag.ASCII_C1 in flags)
+        _set("is_ascii_cc", self.is_ascii_c0 or self.is_ascii_c1)
+        _set("is_ascii_letter", CpFlag.ASCII_LETTER in flags)
+        _set("is_combining", CpFlag.COMBINING in flags)
+        _set(
+            "should_print_placeholder",
+            is_invalid or bool(flags & (CpFlag.CONTROL_OR_FORMAT | CpFlag.SURROGATE | CpFlag.SPACE)),
+        )
+        _set("name", self._resolve_name())
+
+    def __setattr__(self, name: str, value: t.Any):
+        raise AttributeError(f"{pt.get_qname(self)} is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError(f"{pt.get_qname(self)} is immutable")
+
+    def __reduce__(self):
+        return get_char, (self.value,)
 
     def __eq__(self, other: "Char") -> bool:
         if not isinstance(other, self.__class__):
             return False
-        return self._value == other._value
+        return self.value == other.value
 
     def __hash__(self):
-        return hash((self._value, self.__class__.__name__))
+        return self._hash
 
     def __repr__(self):
-        return f"<{pt.get_qname(self)}[U+{ord(self._value):X}][{self._value}]>"
+        return f"<{pt.get_qname(self)}[U+{self.cpnum:X}][{self.value}]>"
 
-    @cached_property
-    def name(self) -> str:
+    def _resolve_name(self) -> str:
         if self.is_surrogate:
             return "(UTF-16 SURROGATE)"
         if self.is_private_use:
@@ -65,96 +154,69 @@ class Char(t.Generic[_CT]):
         if self.is_invalid:
             # printf '\x80' : "0x 80         --  NON UTF-8 BYTE 0x80"
             # printf '\u80' : "0x C2 80    U+80  ASCII C1 BYTE 0x80"
-            return f"NON UTF-8 BYTE 0x{ord(self._value):X}"
+            return f"NON UTF-8 BYTE 0x{self.cpnum:X}"
         try:
-            return unicodedata.name(self._value)
+            return unicodedata.name(self.value)
         except ValueError:
             return self.NO_VALUE
 
-    @cached_property
-    def cat(self) -> str:
-        try:
-            if not self.is_invalid:
-                return unicodedata.category(self._value)
-        except ValueError:
-            pass
-        return self.NO_VALUE
-
-    @cached_property
-    def block(self) -> UnicodeBlock | None:
-        if self.is_invalid:
-            return None
-        return find_block(self.cpnum)
-
-    @property
-    def value(self) -> str:
-        return self._value
-
-    @cached_property
-    def cpnum(self) -> int:
-        return ord(self._value)
-
-    @property
-    def bytelen(self) -> int:
-        return self._bytelen
 
-    @cached_property
-    def bytes(self) -> bytes:
-        if isinstance(self._value, bytes):
-            return self._value
-        return self._value.encode(errors="surrogatepass")
+def get_char(c: str | bytes | int) -> Char:
+    """
+    Flyweight factory: one shared instance per distinct value. Invalid
+    bytes never clash with code points, as `str` and `bytes` keys differ;
+    ints are single bytes (as iterating over `bytes` yields them) and share
+    the instances with the latter. The pool is bounded and evicts the least
+    recently used instances.
+    """
+    if isinstance(c, int):
+        c = bytes((c,))
+    return _get_pooled_char(c)
 
-    @cached_property
-    def decomposition(self) -> str | None:
-        if self.is_invalid:
-            return None
-        return unicodedata.decomposition(self._value)
-
-    @cached_property
-    def should_print_placeholder(self) -> bool:
-        return self.is_control_or_format or self.is_surrogate or self.is_invalid or self.value.isspace()
-
-    @cached_property
-    def is_control_or_format(self) -> bool:
-        return self.cat in ["Cc", "Cf"]
 
-    @cached_property
-    def is_private_use(self) -> bool:
-        return self.cat == "Co"
+@lru_cache(maxsize=CHAR_POOL_SIZE)
+def _get_pooled_char(c: str | bytes) -> Char:
+    return Char(c)
 
-    @cached_property
-    def is_unassigned(self) -> bool:
-        return self.cat == "Cn"
 
-    @cached_property
-    def is_invalid(self) -> bool:
-        return isinstance(self._value, bytes)
+get_char.cache_info = _get_pooled_char.cache_info
+get_char.cache_clear = _get_pooled_char.cache_clear
 
-    @cached_property
-    def is_surrogate(self) -> bool:
-        return 0xD800 <= ord(self._value) <= 0xDFFF
 
-    @cached_property
-    def is_ascii_c0(self) -> bool:
-        return not self.is_invalid and ord(self._value) in self._ASCII_C0
+@dataclass(frozen=True, slots=True)
+class Repeat:
+    """Sequence of identical characters, for merging them ('-m') without making an item for each."""
 
-    @cached_property
-    def is_ascii_c1(self) -> bool:
-        return not self.is_invalid and ord(self._value) in self._ASCII_C1
+    char: Char
+    count: int
 
-    @cached_property
-    def is_ascii_cc(self) -> bool:
-        return self.is_ascii_c0 or self.is_ascii_c1
 
-    @cached_property
-    def is_ascii_letter(self) -> bool:
-        return self._value in self._ASCII_LETTERS
+def get_bytelen(value: str | bytes) -> int:
+    """:returns: the same as `Char(value).bytelen`, but without making an instance."""
+    if isinstance(value, bytes):
+        return len(value)
+    cp = ord(value)
+    return 1 if cp < 0x80 else 2 if cp < 0x800 else 3 if cp < 0x10000 else 4
 
 
 class Groups(t.Dict[Char | str, int]):
     def sorted(self) -> list[tuple[Char | str, int]]:
         return sorted(self.items(), key=lambda kv: -kv[1])
 
+    def select(self, top: int = 0, min_count: int = 0, min_ratio: float = 0.0) -> list[tuple[Char | str, int]]:
+        """
+        Same as `sorted()`, but limited to at most `top` keys (if set), each
+        of which occurs at least `min_count` times and makes at least
+        `min_ratio` percent of the sum. Uses partial selection with a heap,
+        so that the keys that will not be printed do not get sorted.
+        """
+        items = self.items()
+        if min_count > 1 or min_ratio > 0:
+            items = [kv for kv in items if kv[1] >= min_count and kv[1] * 100 >= min_ratio * self.sum]
+        if top and top < len(items):
+            return heapq.nsmallest(top, items, key=lambda kv: -kv[1])
+        return sorted(items, key=lambda kv: -kv[1])
+
     @cached_property
     def sum(self) -> int:
         return sum(self.values())
@@ -0,0 +1,66 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Bulk counting for grouping mode: instead of making a `Char` for each code
+point of the input, the decoded runs are counted as a whole, then the counts
+are mapped to categories through the property table. `Char` instances are
+made only for the keys that end up in the output.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+
+from holms.db.ucprop import get_props, unpack_category
+from .char import Char, Groups, get_bytelen, get_char
+from .opt import Options
+from .writer import CategorySampleCache, RunStats
+
+
+def count_runs(runs: Iterable[str | bytes], opt: Options) -> tuple[Groups, CategorySampleCache, RunStats]:
+    """
+    Same as `CliWriter.count()`, but operates on the output of
+    `CliReader.read_runs()`. The keys are kept in the order of their first
+    occurrence, which `Groups.sorted()` relies on to order equal counts.
+    """
+    counts: Counter[str | bytes] = Counter()
+    for run in runs:
+        if isinstance(run, bytes):
+            for b, count in Counter(run).items():
+                counts[bytes((b,))] += count
+        else:
+            counts.update(run)
+    if opt.oneline:
+        counts.pop("\n", None)
+
+    groups = Groups()
+    cat_cache = CategorySampleCache()
+    run_stats = RunStats()
+    cp_filter = opt.cp_filter
+    for value, count in counts.items():
+        run_stats.proc_chars += count
+        run_stats.proc_bytes += count * get_bytelen(value)
+        if cp_filter and not cp_filter.accepts(value):
+            continue
+
+        if not (opt.group_cats or opt.group_super_cats):
+            groups[get_char(value)] = count
+            continue
+
+        key = _get_category(value)
+        if opt.group_super_cats:
+            key = key[0]
+        if key not in groups:
+            groups[key] = 0
+            cat_cache[key] = get_char(value)
+        groups[key] += count
+
+    return groups, cat_cache, run_stats
+
+
+def _get_category(value: str | bytes) -> str:
+    if isinstance(value, bytes):
+        return Char.NO_VALUE
+    return unpack_category(get_props(ord(value)))
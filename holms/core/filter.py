@@ -0,0 +1,116 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Input filters ('--only-cat', '--only-block', '--range' etc.), which are applied
+right after decoding, so that the characters that are filtered out never
+become `Char` instances. The decision for each code point is precomputed into
+a two-stage table with the same layout as the one in `holms.db.ucprop`.
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+from holms.db import get_blocks
+from holms.db.ucprop import PAGE_BITS, PAGE_NUM, PAGE_SIZE, get_page, unpack_block, unpack_category
+from .char import Char, get_bytelen, get_char
+
+
+@dataclass(frozen=True, slots=True)
+class Gap:
+    """Sequence of filtered out characters, for keeping true offsets and indexes."""
+
+    bytelen: int
+    count: int
+
+
+class CpFilter:
+    def __init__(
+        self,
+        cats: Iterable[str] = (),
+        blocks: Iterable[str] = (),
+        cp_range: tuple[int, int] = None,
+        exclude_ascii: bool = False,
+        invalid_only: bool = False,
+    ):
+        blocks = {*blocks}
+        self._cats = frozenset(cats)
+        self._blocks = {b.start for b in get_blocks() if b.abbr in blocks or b.name in blocks}
+        self._cp_range = cp_range
+        self._exclude_ascii = exclude_ascii
+        self._invalid_only = invalid_only
+        self._pages: list[bytes | None] = [None] * PAGE_NUM
+
+    @property
+    def accepts_invalid(self) -> bool:
+        return self._invalid_only or not (self._cats or self._blocks or self._cp_range)
+
+    def accepts(self, value: str | bytes) -> bool:
+        if isinstance(value, bytes):
+            return self.accepts_invalid
+        cp = ord(value)
+        page = self._pages[cp >> PAGE_BITS] or self._build_page(cp >> PAGE_BITS)
+        return bool(page[cp & (PAGE_SIZE - 1)])
+
+    def parse(self, runs: Iterable[str | bytes]) -> Iterator[Char | Gap | None]:
+        """
+        Same as `Char.parse()`, but operates on the output of
+        `CliReader.read_runs()` and replaces the characters that are
+        filtered out with `Gap` instances.
+        """
+        pages = self._pages
+        accepts_invalid = self.accepts_invalid
+        gap_bytelen = gap_count = 0
+
+        for run in runs:
+            if isinstance(run, bytes):
+                if not accepts_invalid:
+                    gap_bytelen += len(run)
+                    gap_count += len(run)
+                    continue
+                if gap_count:
+                    yield Gap(gap_bytelen, gap_count)
+                    gap_bytelen = gap_count = 0
+                yield from map(get_char, run)
+                continue
+
+            for c in run:
+                cp = ord(c)
+                page = pages[cp >> PAGE_BITS] or self._build_page(cp >> PAGE_BITS)
+                if not page[cp & (PAGE_SIZE - 1)]:
+                    gap_bytelen += get_bytelen(c)
+                    gap_count += 1
+                    continue
+                if gap_count:
+                    yield Gap(gap_bytelen, gap_count)
+                    gap_bytelen = gap_count = 0
+                yield get_char(c)
+
+        if gap_count:
+            yield Gap(gap_bytelen, gap_count)
+        yield None
+
+    def _build_page(self, page_idx: int) -> bytes:
+        start = page_idx << PAGE_BITS
+        page = bytes(self._check(start + idx, props) for idx, props in enumerate(get_page(page_idx)))
+        self._pages[page_idx] = page
+        return page
+
+    def _check(self, cp: int, props: int) -> bool:
+        if self._invalid_only:
+            return False
+        if self._exclude_ascii and cp < 0x80:
+            return False
+        if self._cp_range and not (self._cp_range[0] <= cp <= self._cp_range[1]):
+            return False
+        if self._cats:
+            cat = unpack_category(props)
+            if cat not in self._cats and cat[0] not in self._cats:
+                return False
+        if self._blocks:
+            block = unpack_block(props)
+            if block is None or block.start not in self._blocks or cp > block.end:
+                return False
+        return True
@@ -3,10 +3,10 @@
 #  (c) 2024 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
 from collections.abc import Iterable
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from functools import cached_property
 
-from .attr import Attribute
+from .attr import Attribute, OutputFormat
 
 _FORMAT_ALL = [
     Attribute.OFFSET,
@@ -41,6 +41,9 @@ class Options:
     all_columns: bool = False
     _merge: bool = False
     group_level: int = 0
+    top: int = 0
+    min_count: int = 0
+    min_ratio: float = 0.0
     alt_cc: bool = False
     decimal_offset: bool = False
     _rigid: bool = False
@@ -48,6 +51,18 @@ class Options:
     _names: bool = False
     no_override: bool = False
     _no_table: bool = False
+    output_format: OutputFormat = OutputFormat.TABLE
+    only_cats: tuple[str, ...] = ()
+    only_blocks: tuple[str, ...] = ()
+    cp_range: tuple[int, int] | None = None
+    exclude_ascii: bool = False
+    invalid_only: bool = False
+    jobs: int = 1
+    buffer_limit: int = 256
+
+    def __getstate__(self) -> dict:
+        # drop cached properties, some of them are not picklable
+        return {f.name: getattr(self, f.name) for f in fields(self)}
 
     @cached_property
     def columns(self) -> list[Attribute]:
@@ -67,6 +82,20 @@ class Options:
             yield f
         yield from last
 
+    @cached_property
+    def cp_filter(self) -> "CpFilter | None":
+        if not (self.only_cats or self.only_blocks or self.cp_range or self.exclude_ascii or self.invalid_only):
+            return None
+        from .filter import CpFilter
+
+        return CpFilter(
+            self.only_cats or (),
+            self.only_blocks or (),
+            self.cp_range,
+            self.exclude_ascii,
+            self.invalid_only,
+        )
+
     @cached_property
     def merge(self) -> bool:
         return self._merge or self.group > 0
@@ -0,0 +1,74 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+from __future__ import annotations
+
+import io
+import mmap
+import os
+from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
+
+from .counter import count_runs
+from .opt import Options
+from .reader import SurrogateAwareDecoder
+
+_MIN_RANGE_SIZE = 1024 * 1024
+_RANGES_PER_JOB = 4
+_CHUNK_SIZE = 4 * 1024 * 1024
+_SCAN_SIZE = 64
+
+
+def is_continuation_byte(b: int) -> bool:
+    return b & 0xC0 == 0x80
+
+
+def split_ranges(fp: io.BufferedIOBase, size: int, num: int) -> list[tuple[int, int]]:
+    """
+    Split the file into `num` byte ranges of roughly equal length. Every
+    split point is moved forward to the nearest byte that is not a UTF-8
+    continuation byte, so that each range can be decoded independently
+    and the results would be the same as of sequential decoding.
+    """
+    num = max(1, min(num, size // _MIN_RANGE_SIZE))
+    points = [0]
+    for idx in range(1, num):
+        pos = max(points[-1], size * idx // num)
+        fp.seek(pos)
+        while pos < size:
+            buf = fp.read(_SCAN_SIZE)
+            skip = next((i for i, b in enumerate(buf) if not is_continuation_byte(b)), len(buf))
+            pos += skip
+            if skip < len(buf) or not buf:
+                break
+        points.append(min(pos, size))
+    points.append(size)
+    return [(start, end) for start, end in zip(points, points[1:]) if start < end]
+
+
+def count_range(path: str, start: int, end: int, opt: Options) -> tuple:
+    def _read() -> Iterable[str | bytes]:
+        dec = SurrogateAwareDecoder()
+        with open(path, "rb") as fp, mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for pos in range(start, end, _CHUNK_SIZE):
+                yield from dec.decode_runs(mm[pos : min(end, pos + _CHUNK_SIZE)])
+        yield from dec.decode_runs(b"", True)
+
+    return count_runs(_read(), opt)
+
+
+def count_parallel(path: str, opt: Options) -> Iterable[tuple]:
+    """
+    Count groups of a regular file in a process pool. Yields per-range
+    results in the order of ranges, suitable for `CliWriter.write_groups()`.
+    """
+    jobs = opt.jobs or os.cpu_count() or 1
+    size = os.path.getsize(path)
+    with open(path, "rb") as fp:
+        ranges = split_ranges(fp, size, jobs * _RANGES_PER_JOB)
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [executor.submit(count_range, path, start, end, opt) for start, end in ranges]
+        for future in futures:
+            yield future.result()
@@ -3,45 +3,206 @@
 #  (c) 2023 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
 
+import codecs
 import io
+import mmap
+import os
+import stat
 import sys
+import threading
 import typing
-from codecs import BufferedIncrementalDecoder
 from collections.abc import Iterable
+from io import UnsupportedOperation
 
+from holms.shared import profiler
+from .char import Char, Repeat
+from .filter import Gap
 from .opt import Options
 
+_MAX_SEQ_LEN = 4  # longest possible UTF-8 byte sequence
+_SURROGATE_LEAD = 0xED  # the only lead byte that can fail before the sequence is complete
+
+
+_ERRORS = "holms.stop"
+_surrogatepass = codecs.lookup_error("surrogatepass")
+_state = threading.local()
+
+
+def _stop_at_invalid(e: UnicodeDecodeError) -> tuple[str, int]:
+    try:
+        return _surrogatepass(e)
+    except UnicodeDecodeError:
+        pass
+    _state.error_pos = e.start
+    return "", len(e.object)
+
+
+codecs.register_error(_ERRORS, _stop_at_invalid)
+
+
+class SurrogateAwareDecoder:
+    """
+    Splits the input into maximal runs of valid UTF-8 (surrogates included)
+    and separate invalid bytes in a single pass: each valid run is decoded
+    by one codec call, which stops at the first invalid byte instead of
+    raising. As the exception object gets a copy of the decoded slice,
+    the decoding window starts small after each error and doubles on
+    every successful step, which keeps the copying linear.
+    """
+
+    _MIN_WINDOW = 64
 
-class SurrogateAwareDecoder(BufferedIncrementalDecoder):
     def __init__(self):
-        super().__init__(errors="surrogatepass")
+        self._pending = b""
 
-    def _buffer_decode(self, input, errors, final):
-        try:
-            return input.decode(errors=errors), len(input)
-        except UnicodeDecodeError as e:
-            if e.start == 0:
-                return bytes((input[0],)), 1
-            else:
-                return input[: e.start].decode(errors=errors), e.start
+    @property
+    def pending(self) -> bytes:
+        return self._pending
+
+    def decode_runs(self, input: bytes, final: bool = False) -> Iterable[str | bytes]:
+        """
+        :returns: valid runs as `str` and invalid bytes as 1-byte `bytes`.
+                  Unless `final` is set, the last few bytes can be held
+                  until the next call, as they can be the beginning of
+                  a sequence split between the chunks.
+        """
+        data = self._pending + input if self._pending else input
+        mv = memoryview(data)
+        pos, end = 0, len(data)
+        window = end
+        parts = []
+
+        while pos < end:
+            stop = min(end, pos + window)
+            last = final and stop == end
+            _state.error_pos = None
+            run, consumed = codecs.utf_8_decode(mv[pos:stop], _ERRORS, last)
+            if run:
+                parts.append(run)
+
+            if (err := _state.error_pos) is None:
+                pos += consumed
+                if stop == end:
+                    break
+                window *= 2
+                continue
+
+            err += pos
+            if not last and stop - err < _MAX_SEQ_LEN and data[err] == _SURROGATE_LEAD:
+                pos = err  # not enough lookahead to tell if it's invalid
+                if stop == end:
+                    break
+                continue
+
+            if parts:
+                yield "".join(parts)
+                parts.clear()
+            yield bytes((data[err],))
+            pos = err + 1
+            window = self._MIN_WINDOW
+
+        if parts:
+            yield "".join(parts)
+        self._pending = bytes(mv[pos:])
 
 
 class CliReader:
-    _BUF_SIZE = 4
+    _CHUNK_SIZE = 4 * 1024 * 1024
 
     def __init__(self, opt: Options, io_: io.TextIOWrapper = sys.stdin):
         self._opt = opt
         self._io = io_
+        self._start: int | None = None
+        self._profiler = profiler()
+
+    def read(self) -> Iterable[typing.AnyStr | int]:
+        for run in self.read_runs():
+            yield from run
 
-    def read(self) -> Iterable[typing.AnyStr]:
+    def parse(self) -> Iterable[Char | Gap | Repeat | None]:
+        """Read the input and make chars from it, applying the filters, if any."""
+        chars = parse_runs(self._opt, self.read_runs())
+        if self._profiler:
+            return self._profiler.iterate("chars", chars, count_chars)
+        return chars
+
+    def read_runs(self) -> Iterable[str | bytes]:
+        if self._is_regular_file():
+            yield from self._read_mmap()
+        else:
+            yield from self._read_chunks()
+
+    def is_rewindable(self) -> bool:
+        try:
+            return self._io.buffer.seekable()
+        except (ValueError, AttributeError):
+            return False
+
+    def rewind(self):
+        if self._start is not None:
+            self._io.buffer.seek(self._start)
+
+    def close(self):
+        self._io.close()
+
+    def _is_regular_file(self) -> bool:
+        try:
+            st = os.fstat(self._io.buffer.fileno())
+        except (UnsupportedOperation, OSError, AttributeError):
+            return False
+        return stat.S_ISREG(st.st_mode) and st.st_size > 0
+
+    def _read_mmap(self) -> Iterable[str | bytes]:
         buf = SurrogateAwareDecoder()
+        if self._start is None:
+            self._start = self._io.buffer.tell()
+        start = self._start
+
+        with mmap.mmap(self._io.buffer.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            read = self._instrument_read(lambda pos: mm[pos : pos + self._CHUNK_SIZE])
+            for pos in range(start, len(mm), self._CHUNK_SIZE):
+                yield from self._decode(buf, read(pos))
+        yield from self._decode(buf, b"", True)
+
+    def _read_chunks(self) -> Iterable[str | bytes]:
+        buf = SurrogateAwareDecoder()
+        if self._start is None and self._io.buffer.seekable():
+            self._start = self._io.buffer.tell()
+
+        read = self._instrument_read(self._io.buffer.read)
+        while b := read(self._CHUNK_SIZE):
+            yield from self._decode(buf, b)
+        yield from self._decode(buf, b"", True)
+
+    def _instrument_read(self, read: typing.Callable[[int], bytes]) -> typing.Callable[[int], bytes]:
+        if self._profiler:
+            return self._profiler.wrap("read", read, len)
+        return read
+
+    def _decode(self, buf: SurrogateAwareDecoder, b: bytes, final: bool = False) -> Iterable[str | bytes]:
+        runs = buf.decode_runs(b, final)
+        if self._profiler:
+            return self._profiler.iterate("decode", runs, len)
+        return runs
+
+
+def parse_runs(opt: Options, runs: Iterable[str | bytes]) -> Iterable[Char | Gap | Repeat | None]:
+    """
+    Make chars from the output of `CliReader.read_runs()`. Repeated chars
+    come as `Repeat` items if they are going to be merged anyway (but not
+    counted into groups, nor filtered).
+    """
+    if cp_filter := opt.cp_filter:
+        return cp_filter.parse(runs)
+    if opt.merge and not opt.group:
+        return Char.parse_repeats(runs)
+    return Char.parse(c for run in runs for c in run)
+
 
-        while buf.getstate()[0] or not self._io.closed:
-            if self._io.closed:
-                yield from buf.decode(b'', True)
-            elif b := self._io.buffer.read(self._BUF_SIZE):
-                # if self._opt.ignore_lf:
-                #     b = b.replace(b'\n', b'')
-                yield from buf.decode(b)
-            else:
-                self._io.close()
+def count_chars(char: Char | Gap | Repeat | None) -> int:
+    """Number of characters in an item of `CliReader.parse()` output."""
+    if isinstance(char, (Gap, Repeat)):
+        return char.count
+    return int(char is not None)
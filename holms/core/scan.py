@@ -0,0 +1,115 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Multi-file scanning: directory walking and per-file processing in a pool
+of worker processes. Each file is processed the same way as by 'run' command
+in buffered mode, the output is collected and then printed by the main process
+in the order of files; the groups are counted as well, for the summary.
+"""
+from __future__ import annotations
+
+import dataclasses
+import fnmatch
+import io
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from .attr import OutputFormat
+from .char import Groups
+from .counter import count_runs
+from .opt import Options
+from .reader import CliReader
+from .writer import CategorySampleCache, CliWriter, RunStats
+
+DEFAULT_IGNORE = (".git", ".hg", ".svn", "__pycache__")
+
+_BINARY_PROBE_SIZE = 8 * 1024
+_FILES_PER_TASK = 16
+
+
+@dataclass
+class ScanResult:
+    path: str
+    output: str
+    counted: tuple[Groups, CategorySampleCache, RunStats]
+
+
+def is_binary(path: str) -> bool:
+    """Same heuristic as of git and grep: file is binary if there is a NUL byte near the start."""
+    with open(path, "rb") as fp:
+        return b"\0" in fp.read(_BINARY_PROBE_SIZE)
+
+
+def is_ignored(path: str, ignore: Iterable[str]) -> bool:
+    name = os.path.basename(path)
+    return any(fnmatch.fnmatch(name, pat) or fnmatch.fnmatch(path, pat) for pat in ignore)
+
+
+def walk(paths: Iterable[str], ignore: Iterable[str] = DEFAULT_IGNORE, skip_binary: bool = True) -> Iterator[str]:
+    """
+    Yield regular files from `paths`, descending into directories (in sorted
+    order, without following symlinks to directories). Explicitly specified
+    files are never ignored or skipped.
+    """
+    ignore = [*ignore]
+    for path in paths:
+        if not os.path.isdir(path):
+            yield path
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = sorted(d for d in dirs if not is_ignored(os.path.join(root, d), ignore))
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                if is_ignored(file_path, ignore) or not os.path.isfile(file_path):
+                    continue
+                if skip_binary and is_binary(file_path):
+                    continue
+                yield file_path
+
+
+def scan_file(path: str, opt: Options) -> ScanResult:
+    """
+    :param opt: options of the scan; grouping level applies to the counting
+                for the summary only, the output rows are never grouped.
+    """
+    row_opt = dataclasses.replace(opt, group_level=0)
+    table = opt.output_format == OutputFormat.TABLE
+    output = io.StringIO()
+    writer = CliWriter(row_opt, buffered=table, output=output)
+
+    with open(path, "rb") as fp:
+        reader = CliReader(row_opt, io.TextIOWrapper(fp))
+        if table:
+
+            def _read():
+                reader.rewind()
+                return reader.parse()
+
+            writer.write_two_pass(_read)
+        else:
+            writer.write(reader.parse())
+        reader.rewind()
+        counted = count_runs(reader.read_runs(), opt)
+        reader.close()
+    return ScanResult(path, output.getvalue(), counted)
+
+
+def scan(paths: Iterable[str], opt: Options) -> Iterator[ScanResult]:
+    """
+    Process the files in a process pool of `opt.jobs` workers (all CPUs
+    if 0, in the current process if 1) and yield the results in the order
+    of `paths`.
+    """
+    jobs = opt.jobs or os.cpu_count() or 1
+    if jobs == 1:
+        yield from (scan_file(path, opt) for path in paths)
+        return
+
+    paths = [*paths]
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        chunksize = max(1, min(_FILES_PER_TASK, len(paths) // (jobs * 4)))
+        yield from executor.map(scan_file, paths, [opt] * len(paths), chunksize=chunksize)
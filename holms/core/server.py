@@ -0,0 +1,215 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Server mode: a long-living process listening on a Unix domain socket, which
+handles 'run' requests one by one with already imported modules and warm
+caches (views, block lookups, renderers), so that the cost of the startup is
+paid once instead of per each input.
+
+Protocol: the client sends a header (JSON object terminated with a newline)
+with the options and the output mode, followed by the input bytes, and shuts
+down the writing side of the connection. The server streams the response back
+as frames of `FRAME_HEADER` followed by the payload; the last frame is always
+`FRAME_EXIT` with the exit code.
+"""
+from __future__ import annotations
+
+import errno
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import typing as t
+
+import pytermor as pt
+
+from holms.shared import logger
+from .writer import reset_views, set_views_persistent
+
+FRAME_HEADER = struct.Struct("<cI")
+FRAME_OUTPUT = b"O"
+FRAME_ERROR = b"E"
+FRAME_EXIT = b"X"
+
+_OUTPUT_BUFFER_SIZE = 64 * 1024
+_INPUT_CHUNK_SIZE = 64 * 1024
+
+
+def get_default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR") or "/tmp"
+    return os.path.join(runtime_dir, f"holms-{os.getuid()}.sock")
+
+
+def write_frame(fp: t.BinaryIO, kind: bytes, payload: bytes):
+    fp.write(FRAME_HEADER.pack(kind, len(payload)))
+    fp.write(payload)
+
+
+def read_frame(fp: t.BinaryIO) -> tuple[bytes, bytes] | None:
+    if not (header := fp.read(FRAME_HEADER.size)):
+        return None
+    if len(header) < FRAME_HEADER.size:
+        raise EOFError("Truncated frame header")
+    kind, size = FRAME_HEADER.unpack(header)
+    payload = fp.read(size)
+    if len(payload) < size:
+        raise EOFError("Truncated frame payload")
+    return kind, payload
+
+
+class _FrameWriter(io.RawIOBase):
+    """Wraps everything written into `FRAME_OUTPUT` frames."""
+
+    def __init__(self, fp: t.BinaryIO):
+        super().__init__()
+        self._fp = fp
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        if len(b):
+            write_frame(self._fp, FRAME_OUTPUT, bytes(b))
+            self._fp.flush()
+        return len(b)
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    server: Server
+
+    def handle(self):
+        try:
+            header = json.loads(self.rfile.readline())
+            output = io.TextIOWrapper(
+                io.BufferedWriter(_FrameWriter(self.wfile), _OUTPUT_BUFFER_SIZE),
+                encoding="utf-8",
+                newline="\n",
+            )
+            self.server.process(header, self.rfile, output)
+            output.flush()
+            exit_code = 0
+        except Exception as e:
+            logger(require=False).error(f"Failed to handle the request: {e}", exc_info=True)
+            write_frame(self.wfile, FRAME_ERROR, f"Error: {e}\n".encode())
+            exit_code = 1
+        write_frame(self.wfile, FRAME_EXIT, struct.pack("<i", exit_code))
+
+
+class Server(socketserver.UnixStreamServer):
+    """
+    Requests are handled sequentially in the main thread, because the renderer
+    and the view caches are global.
+    """
+
+    def __init__(self, path: str):
+        """
+        :raises FileExistsError: if `path` is not a socket, or another server
+                                 is listening on it.
+        """
+        self._socket_id: tuple[int, int] | None = None
+        self._remove_stale_socket(path)
+        old_umask = os.umask(0o177)  # the socket is created by bind(), and is accessible right away
+        try:
+            super().__init__(path, _RequestHandler)
+        finally:
+            os.umask(old_umask)
+        st = os.lstat(path)
+        self._socket_id = (st.st_dev, st.st_ino)
+        self._renderers: dict[str, pt.IRenderer] = dict()
+        self._output_mode: str | None = None
+        set_views_persistent(True)
+
+    def process(self, header: dict, input: t.BinaryIO, output: io.TextIOBase):
+        from holms.cmd.run import invoke_run
+
+        output_mode = header["output_mode"]
+        if output_mode != self._output_mode:
+            reset_views(force=True)  # cached strings were rendered by another renderer
+            self._output_mode = output_mode
+        if not (renderer := self._renderers.get(output_mode)):
+            renderer = self._renderers.setdefault(output_mode, pt.SgrRenderer(output_mode))
+
+        pt.RendererManager.override(renderer)
+        try:
+            invoke_run(header["buffered"], input, output, **header["options"])
+        finally:
+            pt.RendererManager.override()
+
+    def server_close(self):
+        super().server_close()
+        set_views_persistent(False)
+        reset_views()
+        try:
+            st = os.lstat(self.server_address)
+        except OSError:
+            return
+        if (st.st_dev, st.st_ino) == self._socket_id:  # not replaced by someone else since
+            os.unlink(self.server_address)
+
+    @staticmethod
+    def _remove_stale_socket(path: str):
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            return
+        if not stat.S_ISSOCK(st.st_mode):
+            raise FileExistsError(errno.EEXIST, "Path exists and is not a socket", path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            try:
+                sock.connect(path)
+            except ConnectionRefusedError:
+                os.unlink(path)  # stale socket of a server that wasn't shut down properly
+                return
+        raise FileExistsError(errno.EEXIST, "Server is already running", path)
+
+
+def send_request(
+    path: str,
+    options: dict,
+    buffered: bool,
+    output_mode: str,
+    input: t.BinaryIO,
+    output: t.BinaryIO,
+    error: t.BinaryIO = None,
+) -> int:
+    """
+    Forward the input to the server listening on `path` and copy the results
+    to `output` (and `error`) as they arrive.
+
+    :returns: exit code of the request
+    """
+    import threading
+
+    def _send():
+        try:
+            sock.sendall(json.dumps(header).encode() + b"\n")
+            read = getattr(input, "read1", input.read)  # do not wait for a full chunk from a pipe
+            while chunk := read(_INPUT_CHUNK_SIZE):
+                sock.sendall(chunk)
+            sock.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass  # server has closed the connection, the reason will be in the response
+
+    header = {"buffered": buffered, "output_mode": output_mode, "options": options}
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        # input is sent in parallel with receiving the output, otherwise with
+        # large inputs both sides could get stuck on full socket buffers
+        sender = threading.Thread(target=_send, daemon=True)
+        sender.start()
+
+        with sock.makefile("rb") as rfile:
+            while frame := read_frame(rfile):
+                kind, payload = frame
+                if kind == FRAME_EXIT:
+                    return struct.unpack("<i", payload)[0]
+                target = output if kind == FRAME_OUTPUT else (error or sys.stderr.buffer)
+                target.write(payload)
+                target.flush()
+    raise EOFError("Connection closed without an exit code")
@@ -0,0 +1,161 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Machine-readable output formats. Sinks get the same rows as the table
+renderer, but write the raw values of the selected columns, without any
+styling and column width tracking, so they do not need the rows to be
+buffered (grouping mode still does).
+"""
+from __future__ import annotations
+
+import csv
+import json
+import struct
+import typing as t
+from abc import abstractmethod
+from operator import attrgetter
+
+from .attr import Attribute, OutputFormat
+from .char import Char
+from .opt import Options
+from .writer import CliWriter, OutputBuffer, Row, RowBuffer
+
+Value = t.Union[int, str, None]
+
+
+class ISink:
+    _CHAR_VALUES_CACHE_SIZE = 4096
+
+    def __init__(self, opt: Options, output: OutputBuffer):
+        self._opt = opt
+        self._output = output
+        self._columns = [Attribute(attr) for attr in opt.columns]
+        self._keys = [attr.value for attr in self._columns]
+
+        # only these change from row to row, the rest depends on the char only
+        self._row_getters: list[tuple[int, t.Callable[[Row], Value]]] = []
+        if not opt.group:
+            for idx, attr in enumerate(self._columns):
+                if attr == Attribute.OFFSET:
+                    self._row_getters.append((idx, attrgetter("offset")))
+                elif attr == Attribute.INDEX:
+                    self._row_getters.append((idx, attrgetter("index")))
+        for idx, attr in enumerate(self._columns):
+            if attr == Attribute.COUNT:
+                self._row_getters.append((idx, lambda row: row.dup_count + 1))
+        self._char_values: dict[Char, list[Value]] = dict()
+
+    def write_row(self, row: Row):
+        self._write_values(self.get_values(row))
+
+    def write_others(self, count: int):
+        """
+        Aggregated record for the groups omitted because of '--top' and
+        '--min-*' options: the count column holds the sum of their counts,
+        the rest of the columns are empty.
+        """
+        self._write_values([count if attr == Attribute.COUNT else None for attr in self._columns])
+
+    @abstractmethod
+    def _write_values(self, values: list[Value]):
+        ...
+
+    def get_values(self, row: Row) -> list[Value]:
+        if (values := self._char_values.get(row.char)) is None:
+            values = self._make_char_values(row.char)
+        values = values.copy()
+        for idx, getter in self._row_getters:
+            values[idx] = getter(row)
+        return values
+
+    def _make_char_values(self, char: Char) -> list[Value]:
+        if len(self._char_values) >= self._CHAR_VALUES_CACHE_SIZE:
+            self._char_values.clear()
+        values = self._char_values[char] = [self._get_char_value(char, attr) for attr in self._columns]
+        return values
+
+    def _get_char_value(self, char: Char, attr: Attribute) -> Value:
+        opt = self._opt
+        if attr in (Attribute.OFFSET, Attribute.INDEX, Attribute.COUNT):
+            return None
+        if attr == Attribute.CAT:
+            return None if char.is_invalid else CliWriter.get_effective_category(opt, char)
+        if opt.group_cats:
+            return None  # the row represents a category, not a code point
+
+        if attr == Attribute.RAW:
+            return char.bytes.hex()
+        if attr == Attribute.NUMBER:
+            return None if char.is_invalid else char.cpnum
+        if attr == Attribute.CHAR:
+            return None if char.is_invalid else char.value
+        if attr == Attribute.NAME:
+            return char.name
+        if attr == Attribute.BLOCK:
+            return char.block.name if char.block else None
+        raise LookupError(f"No value defined for {attr!r}")
+
+
+class NdjsonSink(ISink):
+    def __init__(self, opt: Options, output: OutputBuffer):
+        super().__init__(opt, output)
+        self._encoder = json.JSONEncoder(ensure_ascii=False)
+
+    def _write_values(self, values: list[Value]):
+        self._output.write(self._encoder.encode(dict(zip(self._keys, values))) + "\n")
+
+
+class CsvSink(ISink):
+    DIALECT = csv.excel
+
+    def __init__(self, opt: Options, output: OutputBuffer):
+        super().__init__(opt, output)
+        self._writer = csv.writer(output, self.DIALECT, lineterminator="\n")
+        self._writer.writerow(self._keys)
+
+    def _write_values(self, values: list[Value]):
+        self._writer.writerow(values)
+
+
+class TsvSink(CsvSink):
+    DIALECT = csv.excel_tab
+
+
+class BinarySink(ISink):
+    """
+    Fixed-size little-endian records, one per row, regardless of the column
+    selection (everything else can be derived from the code point):
+
+        u64 offset, u64 index, u64 count, u32 code point
+
+    Code points of invalid bytes have `RowBuffer.INVALID_FLAG` bit set. In
+    category grouping mode the code point is of the first char of the category.
+    The aggregated record of the omitted groups has `OTHERS_CP` code point
+    and zero offset and index.
+    """
+
+    RECORD = struct.Struct("<QQQI")
+    OTHERS_CP = 0xFFFFFFFF
+
+    def write_row(self, row: Row):
+        cp = row.char.cpnum
+        if row.char.is_invalid:
+            cp |= RowBuffer.INVALID_FLAG
+        self._output.write(self.RECORD.pack(row.offset, row.index, row.dup_count + 1, cp))
+
+    def write_others(self, count: int):
+        self._output.write(self.RECORD.pack(0, 0, count, self.OTHERS_CP))
+
+
+_SINKS: dict[OutputFormat, type[ISink]] = {
+    OutputFormat.NDJSON: NdjsonSink,
+    OutputFormat.CSV: CsvSink,
+    OutputFormat.TSV: TsvSink,
+    OutputFormat.BINARY: BinarySink,
+}
+
+
+def make_sink(opt: Options, output: OutputBuffer) -> ISink:
+    return _SINKS[opt.output_format](opt, output)
@@ -0,0 +1,192 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Unbuffered mode as a pipeline of four stages joined by bounded queues:
+reading, decoding, rendering and writing. A slow output device stalls only
+the writing stage (until the queues fill up), while the input keeps being
+read; and whatever piles up in a queue while the next stage is busy is taken
+at once, so that bursts of input are decoded, rendered and written by fewer
+and larger calls.
+
+Blocking reads are made in a separate daemon thread, as there is no portable
+way to wait for a regular file (or a pipe, on some platforms) in the event
+loop, and a thread stuck in `read()` should not prevent the exit.
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import stat
+import sys
+import threading
+import typing as t
+from concurrent.futures import CancelledError
+
+from holms.shared import logger, profiler
+from .attr import OutputFormat
+from .char import Char, Repeat
+from .filter import Gap
+from .opt import Options
+from .reader import SurrogateAwareDecoder, count_chars, parse_runs
+from .writer import CliWriter, RunStats
+
+
+class _PendingOutput:
+    """Collects the output of `CliWriter` until the rendering stage takes it."""
+
+    def __init__(self):
+        self._parts: list[t.AnyStr] = []
+
+    def write(self, s: t.AnyStr):
+        self._parts.append(s)
+
+    def flush(self):
+        pass
+
+    def take(self) -> list[t.AnyStr]:
+        parts, self._parts = self._parts, []
+        return parts
+
+
+class StreamPipeline:
+    _CHUNK_SIZE = 8 * 1024
+    _QUEUE_SIZE = 4
+    _MAX_BATCH = 4  # output of a stage is ~100 times larger than the input, so the batches should not be too big
+    _FOLLOW_INTERVAL = 0.25
+
+    def __init__(self, opt: Options, input: t.BinaryIO, output: t.IO = None, follow: bool = False):
+        """
+        :param follow: do not stop at the end of `input`, but wait for more
+                       data to be appended, like 'tail -f' does. Has no effect
+                       if `input` is not a regular file.
+        """
+        self._opt = opt
+        self._input = input
+        self._output = output or sys.stdout
+        if opt.output_format == OutputFormat.BINARY:
+            self._output = getattr(self._output, "buffer", self._output)
+        self._follow = follow and self._is_regular_file()
+
+        self._pending = _PendingOutput()
+        self._writer = CliWriter(opt, False, self._pending, autoflush=False)
+        self._run_stats = RunStats()
+        if prof := profiler():
+            self._decode_batch = prof.wrap("decode", self._decode_batch, lambda runs: sum(map(len, runs)))
+            self._parse_batch = prof.wrap("chars", self._parse_batch, lambda chars: sum(map(count_chars, chars)))
+            self._write_parts = prof.wrap("output", self._write_parts, lambda size: size)
+
+    def run(self) -> RunStats:
+        try:
+            asyncio.run(self._run())
+        except KeyboardInterrupt:
+            if not self._follow:
+                raise
+        return self._run_stats
+
+    async def _run(self):
+        chunks = asyncio.Queue(self._QUEUE_SIZE * self._MAX_BATCH)
+        parsed = asyncio.Queue(self._QUEUE_SIZE)
+        rendered = asyncio.Queue(self._QUEUE_SIZE)
+
+        loop = asyncio.get_running_loop()
+        threading.Thread(target=self._read, args=(loop, chunks), daemon=True).start()
+        await asyncio.gather(
+            self._decode(chunks, parsed),
+            self._render(parsed, rendered),
+            self._write(rendered),
+        )
+
+    def _read(self, loop: asyncio.AbstractEventLoop, chunks: asyncio.Queue):
+        read = getattr(self._input, "read1", self._input.read)  # return as soon as anything is available
+        if prof := profiler():
+            read = prof.wrap("read", read, len)
+        while True:
+            try:
+                chunk = read(self._CHUNK_SIZE)
+            except (OSError, ValueError) as e:
+                if not loop.is_closed():
+                    logger().error(f"Failed to read the input: {e}")
+                chunk = None
+            if chunk == b"" and self._follow:
+                self._wait_for_data()
+                continue
+            if loop.is_closed():
+                return  # one of the stages has failed
+            try:
+                asyncio.run_coroutine_threadsafe(chunks.put(chunk or None), loop).result()
+            except (RuntimeError, CancelledError):
+                return
+            if not chunk:
+                return
+
+    def _wait_for_data(self):
+        threading.Event().wait(self._FOLLOW_INTERVAL)
+        pos = self._input.tell()
+        if os.fstat(self._input.fileno()).st_size < pos:
+            logger().warning("Input file has been truncated, reading from the start")
+            self._input.seek(0)
+
+    async def _decode(self, chunks: asyncio.Queue, parsed: asyncio.Queue):
+        dec = SurrogateAwareDecoder()
+        while True:
+            batch = await self._take(chunks, self._MAX_BATCH)
+            final = batch[-1] is None
+            runs = self._decode_batch(dec, b"".join(batch[:-1] if final else batch), final)
+            chars = self._parse_batch(runs)
+            if not final:
+                chars.pop()  # end of the input marker, which both parsers yield
+            await parsed.put(chars)
+            if final:
+                return
+
+    async def _render(self, parsed: asyncio.Queue, rendered: asyncio.Queue):
+        while True:
+            batch = await self._take(parsed, self._MAX_BATCH)
+            chars: list[Char | Gap | Repeat | None] = [c for part in batch for c in part]
+            stats = self._writer.feed(chars)
+            self._run_stats.proc_chars += stats.proc_chars
+            self._run_stats.proc_bytes += stats.proc_bytes
+            final = bool(chars) and chars[-1] is None
+            parts = self._pending.take()
+            if final:
+                await rendered.put([*parts, None])
+                return
+            if parts:
+                await rendered.put(parts)
+
+    async def _write(self, rendered: asyncio.Queue):
+        while True:
+            batch = [p for part in await self._take(rendered) for p in part]
+            final = bool(batch) and batch[-1] is None
+            if parts := batch[:-1] if final else batch:
+                await asyncio.to_thread(self._write_parts, parts)
+            if final:
+                return
+
+    def _decode_batch(self, dec: SurrogateAwareDecoder, data: bytes, final: bool) -> list[str | bytes]:
+        return [*dec.decode_runs(data, final)]
+
+    def _parse_batch(self, runs: list[str | bytes]) -> list[Char | Gap | Repeat | None]:
+        return [*parse_runs(self._opt, runs)]
+
+    def _write_parts(self, parts: list[t.AnyStr]) -> int:
+        data = parts[0][:0].join(parts)
+        self._output.write(data)
+        self._output.flush()
+        return len(data)
+
+    @staticmethod
+    async def _take(queue: asyncio.Queue, limit: int = None) -> list:
+        """Wait for an item, then take everything else that is already there (up to `limit` items total)."""
+        items = [await queue.get()]
+        while not queue.empty() and items[-1] is not None and len(items) != limit:
+            items.append(queue.get_nowait())
+        return items
+
+    def _is_regular_file(self) -> bool:
+        try:
+            return stat.S_ISREG(os.fstat(self._input.fileno()).st_mode)
+        except (OSError, AttributeError, ValueError):
+            return False
@@ -15,14 +15,24 @@ from .opt import Options
 
 
 class _ViewRegistry:
+    _view_classes = dict()
     _views = dict()
+    _persistent = False
 
     @classmethod
     def get(cls, attr: Attribute) -> IView:
         if fmt := cls._views.get(attr, None):
             return fmt
+        if view_cls := cls._view_classes.get(attr, None):
+            return view_cls(view_cls.attr())  # <- instantiate on first use
         raise RuntimeError(f"No view defined for {attr!r}")
 
+    @classmethod
+    def add_class(cls, view_cls: type[IView], attr: Attribute):
+        if attr in cls._view_classes.keys():
+            raise RuntimeError(f"There is an already registered view class for {attr!r}.")
+        cls._view_classes.update({attr: view_cls})
+
     @classmethod
     def add(cls, v: IView, attr: Attribute):
         if not attr:
@@ -35,7 +45,9 @@ class _ViewRegistry:
         cls._views.update({attr: v})
 
     @classmethod
-    def reset(cls):
+    def reset(cls, force=False):
+        if cls._persistent and not force:
+            return
         for v in cls._views.values():
             v.reset(shutdown=True)
 
@@ -44,7 +56,7 @@ class _ViewMeta(abc.ABCMeta):
     def __new__(__mcls: type[_ViewMeta], __name, __bases, __namespace, **kwargs):
         cls: _ViewMeta | type[IView] = super().__new__(__mcls, __name, __bases, __namespace, **kwargs)
         if len(__bases):
-            cls(cls.attr())  # <- instantiate
+            _ViewRegistry.add_class(cls, cls.attr())
         return cls
 
 
@@ -128,5 +140,14 @@ def get_view(attr: Attribute) -> IView:
     return _ViewRegistry.get(attr)
 
 
-def reset_views():
-    _ViewRegistry.reset()
+def reset_views(force=False):
+    _ViewRegistry.reset(force)
+
+
+def set_views_persistent(persistent: bool):
+    """
+    Keep the caches of the views between `CliWriter` instances (for the server
+    mode). The rendered strings depend on the current renderer, so it's up to
+    the caller to reset them with ``force=True`` when the renderer changes.
+    """
+    _ViewRegistry._persistent = persistent
@@ -6,22 +6,27 @@ from __future__ import annotations
 
 import io
 import math
-import re
+import struct
 import sys
-import unicodedata
-from collections import deque, OrderedDict
-from collections.abc import Iterable, Iterator
+import threading
+import time
+import typing as t
+from array import array
+from collections import OrderedDict
+from collections.abc import Callable, Iterable, Iterator
 from dataclasses import dataclass
 from functools import lru_cache
 
 import pytermor as pt
 
-from holms.db import resolve_category, UnicodeBlock, find_block, resolve_ascii_cc
-from holms.shared import CacheInfo
+from holms.db import resolve_category, UnicodeBlock, resolve_ascii_cc
+from holms.shared import CacheInfo, profiler
+from holms.shared.perf import Profiler
 from holms.shared.scale import format_ratio, Scale
-from .attr import Attribute
-from .cats import resolve_cat_style, OVERRIDE_CHARS
-from .char import Char, Groups
+from .attr import Attribute, OutputFormat
+from .cats import resolve_cat_style, CategoryStyles, OVERRIDE_CHARS
+from .char import Char, Groups, Repeat, get_char
+from .filter import Gap
 from .opt import Options
 
 COLUMN_SEPARATOR = " "
@@ -45,13 +50,11 @@ class Column:
         return self.max_val
 
     def update_width(self, width) -> int:
-        if width > self.max_width:
-            get_view(self.attr).reset()
         self.max_width = max(self.max_width, width)
         return self.max_width
 
 
-@dataclass
+@dataclass(slots=True)
 class Row:
     char: Char | None
     offset: int
@@ -73,6 +76,145 @@ class Row:
         return self.char is not None
 
 
+class RowBuffer:
+    """
+    Struct-of-arrays storage for the rows in buffered mode: instead of
+    keeping a `Row` instance per output line, it keeps four machine integers
+    and recreates the rows on the fly when iterated. If `limit` (in bytes)
+    is set and exceeded, the arrays are spilled to a temporary file, which
+    is replayed on iteration.
+    """
+
+    INVALID_FLAG = 1 << 31
+    ROW_SIZE = 4 + 3 * 8
+    _HEADER = struct.Struct("<Q")
+
+    def __init__(self, limit: int = 0):
+        self._max_len = max(1, limit // self.ROW_SIZE) if limit else 0
+        self._spill_file: t.BinaryIO | None = None
+        self._spilled_len = 0
+        self._reset_arrays()
+
+    def __len__(self) -> int:
+        return self._spilled_len + len(self._cps)
+
+    def __iter__(self) -> Iterator[Row]:
+        if self._spill_file:
+            self._spill_file.seek(0)
+            while header := self._spill_file.read(self._HEADER.size):
+                (num,) = self._HEADER.unpack(header)
+                arrays = self._load_arrays(self._spill_file, num)
+                yield from self._make_rows(*arrays)
+        yield from self._make_rows(self._cps, self._offsets, self._indexes, self._dup_counts)
+
+    def append(self, row: Row):
+        cp = row.char.cpnum
+        if row.char.is_invalid:
+            cp |= self.INVALID_FLAG
+        self._cps.append(cp)
+        self._offsets.append(row.offset)
+        self._indexes.append(row.index)
+        self._dup_counts.append(row.dup_count)
+
+        if self._max_len and len(self._cps) >= self._max_len:
+            self._spill()
+
+    @property
+    def spilled(self) -> bool:
+        return self._spill_file is not None
+
+    def close(self):
+        if self._spill_file:
+            self._spill_file.close()
+            self._spill_file = None
+            self._spilled_len = 0
+        self._reset_arrays()
+
+    def _reset_arrays(self):
+        self._cps = array("I")
+        self._offsets = array("Q")
+        self._indexes = array("Q")
+        self._dup_counts = array("Q")
+
+    def _spill(self):
+        if not self._spill_file:
+            import tempfile
+
+            self._spill_file = tempfile.TemporaryFile(prefix="holms-")
+        self._spill_file.seek(0, io.SEEK_END)
+        self._spill_file.write(self._HEADER.pack(len(self._cps)))
+        for arr in (self._cps, self._offsets, self._indexes, self._dup_counts):
+            arr.tofile(self._spill_file)
+        self._spilled_len += len(self._cps)
+        self._reset_arrays()
+
+    @staticmethod
+    def _load_arrays(fp: t.BinaryIO, num: int) -> tuple[array, ...]:
+        arrays = (array("I"), array("Q"), array("Q"), array("Q"))
+        for arr in arrays:
+            arr.fromfile(fp, num)
+        return arrays
+
+    def _make_rows(self, cps: array, *args: array) -> Iterator[Row]:
+        yield from map(Row, map(self._make_char, cps), *args)
+
+    def _make_char(self, cp: int) -> Char:
+        if cp & self.INVALID_FLAG:
+            return get_char(bytes((cp & 0xFF,)))
+        return get_char(chr(cp))
+
+
+class OutputBuffer:
+    """
+    Accumulates rendered rows and writes them to `output` in bulk: when
+    `size_limit` characters are pending, when `interval` seconds have passed
+    since the first pending row (if set; this one is driven by a timer, so
+    the rows do not get stuck when the input stalls), or on `flush()`.
+    """
+
+    def __init__(self, output: t.IO, size_limit: int, interval: float = None):
+        self._output = output
+        self._size_limit = size_limit
+        self._interval = interval
+        self._parts: list[t.AnyStr] = []
+        self._size = 0
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def instrument(self, prof: Profiler):
+        self._write_output = prof.wrap("output", self._write_output, lambda size: size)
+
+    def write(self, s: t.AnyStr):
+        with self._lock:
+            self._parts.append(s)
+            self._size += len(s)
+            if self._size < self._size_limit:
+                if self._interval and not self._timer:
+                    self._timer = threading.Timer(self._interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+                return
+            self._flush()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._parts:
+            self._write_output(self._parts[0][:0].join(self._parts))
+            self._parts.clear()
+            self._size = 0
+        self._output.flush()
+
+    def _write_output(self, data: t.AnyStr) -> int:
+        self._output.write(data)
+        return len(data)
+
+
 CategorySampleCache = dict[str, Char]
 
 
@@ -117,25 +259,54 @@ class RunStats:
     proc_chars: int = 0
 
 
-from .view import IView, get_view, reset_views
+from .view import IView, get_view, reset_views, set_views_persistent
 
 
 class CliWriter:
-    def __init__(self, opt: Options, buffered: bool, output: io.IOBase = None):
+    _ADDRESS_ATTRS = frozenset({Attribute.OFFSET, Attribute.INDEX})
+    _ROW_TEMPLATE_CACHE_SIZE = 4096
+    _OUTPUT_BUFFER_SIZE = 64 * 1024
+    _OUTPUT_FLUSH_INTERVAL = 0.1
+
+    def __init__(self, opt: Options, buffered: bool, output: io.IOBase = None, autoflush: bool = True):
+        """
+        :param autoflush: flush the output periodically in unbuffered mode;
+                          can be disabled if the caller flushes it by itself.
+        """
         self._opt = opt
         self._buffered = buffered
-        self._output = output or sys.stdout
+        self._measuring = False
+        self._measured = False
+        self._merge_run: tuple[Char | None, int] = (None, 0)
+        output = output or sys.stdout
+        if opt.output_format == OutputFormat.BINARY:
+            output = getattr(output, "buffer", output)
+        self._output = OutputBuffer(
+            output,
+            self._OUTPUT_BUFFER_SIZE,
+            None if buffered or not autoflush else self._OUTPUT_FLUSH_INTERVAL,
+        )
+        self._sink = None
+        if opt.output_format != OutputFormat.TABLE:
+            from .sink import make_sink
+
+            self._sink = make_sink(opt, self._output)
 
-        self._buffer = deque[Row]()
+        self._buffer = RowBuffer(opt.buffer_limit * 1024 * 1024)
         self._table = Table({a: Column(a) for a in self._opt.columns})
         if not self._buffered:
             self._table.set_defaults()
         self._groups = Groups()
         self._cat_cache = CategorySampleCache()
+        self._row_templates: dict[tuple, tuple[str | tuple, ...]] = dict()
+        self._row_templates_info = CacheInfo(maxsize=self._ROW_TEMPLATE_CACHE_SIZE, resets=1)
+        if prof := profiler():
+            self._instrument(prof, measure_output=autoflush)  # otherwise the caller writes the output by itself
 
     def __del__(self):
         reset_views()  # drops lru caches with rendered strings
-        CacheInfo().upd_from_tuple(find_block.cache_info()).debug(find_block.__qualname__)
+        self._row_templates_info.debug(self._get_row_template.__qualname__)
+        CacheInfo().upd_from_tuple(get_char.cache_info()).debug(get_char.__qualname__)
 
     @staticmethod
     def get_group_key(opt: Options, char: Char) -> Char | str:
@@ -149,67 +320,174 @@ class CliWriter:
             return char.cat[0]
         return char.cat
 
-    def write(self, chars: Iterator[Char | None]) -> RunStats:
-        prev_char: Char | None = None
-        dup_count = 0
-        run_stats = RunStats()
-        opt = self._opt
+    def write(self, chars: Iterator[Char | Gap | Repeat | None]) -> RunStats:
+        run_stats = self._process(chars)
 
         if self._buffered:
-            chars = [*chars]
+            self._print_buffer()
+        self._output.flush()
+        return run_stats
+
+    def feed(self, chars: Iterable[Char | Gap | Repeat | None]) -> RunStats:
+        """
+        Unbuffered mode for the input coming in parts: process the next part
+        and flush the output. Merging state is carried over between the calls;
+        `None` marks the end of the input, as usual.
+        """
+        run_stats = self._process(chars)
+        self._output.flush()
+        return run_stats
+
+    def write_two_pass(self, read: Callable[[], Iterable[Char | Gap | Repeat | None]]) -> RunStats:
+        """
+        Buffered mode for inputs that can be read twice, without keeping
+        the rows in memory: the first pass only computes the column widths,
+        the second one prints the rows right away. `read` should return
+        a new iterator over the same input each time it is called.
+        """
+        self._measuring = True
+        self._process(read())
+        self._update_columns()
+
+        self._measuring = False
+        self._measured = True
+        self._table.offset = 0
+        self._table.index = 0
+        run_stats = self._process(read())
+        self._output.flush()
+        return run_stats
+
+    def _process(self, chars: Iterable[Char | Gap | Repeat | None]) -> RunStats:
+        prev_char, dup_count = self._merge_run
+        run_stats = RunStats()
+        opt = self._opt
 
         for char in chars:
+            if isinstance(char, Gap):
+                run_stats.proc_chars += char.count
+                run_stats.proc_bytes += char.bytelen
+                if prev_char:
+                    self._make_row(prev_char, dup_count)
+                    prev_char, dup_count = None, 0
+                self._table.offset += char.bytelen
+                self._table.index += char.count
+                continue
+
+            repeats = 1
+            if isinstance(char, Repeat):
+                char, repeats = char.char, char.count
             if char:
                 if opt.oneline and char.value == "\n":
                     continue
-                run_stats.proc_chars += 1
-                run_stats.proc_bytes += char.bytelen
+                run_stats.proc_chars += repeats
+                run_stats.proc_bytes += repeats * char.bytelen
 
             if opt.group:
                 if char is not None:
-                    key = self.get_group_key(opt, char)
-                    if key not in self._groups.keys():
-                        self._groups[key] = 0
-                        if not isinstance(key, Char):
-                            self._cat_cache[key] = char
-                    self._groups[key] += 1
+                    self._add_to_groups(char)
                 continue
 
             if not opt.merge:
                 self._make_row(char)
                 continue
 
-            if prev_char and prev_char != char:
-                self._make_row(prev_char, dup_count)
-                dup_count = 0
             if prev_char == char:
-                dup_count += 1
-            prev_char = char
+                dup_count += repeats
+                continue
+            if prev_char:
+                self._make_row(prev_char, dup_count)
+            prev_char, dup_count = char, repeats - 1
 
-        if not self._buffered:
-            return run_stats
+        self._merge_run = (prev_char, dup_count if prev_char else 0)
+        return run_stats
 
-        if opt.group:
-            for key, count in self._groups.sorted():
+    def count(self, chars: Iterator[Char | None]) -> tuple[Groups, CategorySampleCache, RunStats]:
+        """
+        Fill the groups without printing anything; the results are
+        to be merged by another writer instance with `write_groups()`.
+        """
+        run_stats = RunStats()
+        for char in chars:
+            if char is None or (self._opt.oneline and char.value == "\n"):
+                continue
+            run_stats.proc_chars += 1
+            run_stats.proc_bytes += char.bytelen
+            self._add_to_groups(char)
+        return self._groups, self._cat_cache, run_stats
+
+    def write_groups(self, parts: Iterable[tuple[Groups, CategorySampleCache, RunStats]]) -> RunStats:
+        """
+        Merge the results of `count()` calls in the order of input
+        ranges and print them as if the input has been read at once.
+        """
+        run_stats = RunStats()
+        for groups, cat_cache, stats in parts:
+            for key, count in groups.items():
+                self._groups[key] = self._groups.get(key, 0) + count
+            for key, char in cat_cache.items():
+                self._cat_cache.setdefault(key, char)
+            run_stats.proc_chars += stats.proc_chars
+            run_stats.proc_bytes += stats.proc_bytes
+
+        self._print_buffer()
+        self._output.flush()
+        return run_stats
+
+    def _instrument(self, prof: Profiler, measure_output: bool):
+        self._update_columns = prof.wrap("columns", self._update_columns)
+        self._render_row = prof.wrap("render", self._render_row)
+        self._add_to_groups = prof.wrap("group", self._add_to_groups)
+        if self._sink:
+            self._sink.write_row = prof.wrap("render", self._sink.write_row)
+        if measure_output:
+            self._output.instrument(prof)
+
+    def _add_to_groups(self, char: Char):
+        key = self.get_group_key(self._opt, char)
+        if key not in self._groups.keys():
+            self._groups[key] = 0
+            if not isinstance(key, Char):
+                self._cat_cache[key] = char
+        self._groups[key] += 1
+
+    def _print_buffer(self):
+        others_num = others_count = 0
+        if self._opt.group:
+            opt = self._opt
+            selected = self._groups.select(opt.top, opt.min_count, opt.min_ratio)
+            for key, count in selected:
                 char = key if isinstance(key, Char) else self._cat_cache.get(key)
                 self._make_row(char, count - 1)
+            others_num = len(self._groups) - len(selected)
+            others_count = self._groups.sum - sum(count for _, count in selected)
+            if others_count and (col := self._table.get(Attribute.COUNT)):
+                col.update_width(len(str(others_count)))
 
         self._update_columns()
+        first_row = None
         for row in self._buffer:
+            first_row = first_row or row
             self._print_row(row)
+        self._buffer.close()
 
-        return run_stats
+        if others_num and self._sink:
+            self._sink.write_others(others_count)
+        elif others_num and not self._opt.no_table:
+            self._print_others_row(first_row, others_num, others_count)
 
     def _make_row(self, char: Char | None, dup_count: int = 0):
         if char is None:
             return
         row = Row(char, self._table.offset, self._table.index, dup_count)
-        self._update_columns(row)
+        if not self._measured and not self._sink:
+            self._update_columns(row)
         char_count = 1 + dup_count
         self._table.offset += char_count * char.bytelen
         self._table.index += char_count
 
-        if self._buffered:
+        if self._measuring:
+            return
+        if self._buffered and not self._measured:
             self._buffer.append(row)
         else:
             self._print_row(row)
@@ -217,22 +495,92 @@ class CliWriter:
     def _print_row(self, row: Row):
         if not row.is_visible:
             return
+        if self._sink:
+            self._sink.write_row(row)
+            return
         rendered = self._render_row(row)
-        pt.echo(rendered, nl=(not self._opt.no_table), file=self._output)
-
-    def _render_row(self, row: Row):
-        def __iter() -> Iterable[str]:
-            seen = set()
-            for attr in self._opt.columns:
-                view = get_view(attr)
-                col = self._table.get(attr)
-                first_of_type = attr not in seen
-                yield view.get_sep_before(col, COLUMN_SEPARATOR)
-                yield view.render(self._opt, row, col, self._groups, first_of_type)
-                yield view.get_sep_after(col, COLUMN_SEPARATOR)
-                seen.add(attr)
-
-        return pt.joine(*__iter())
+        self._output.write(rendered if self._opt.no_table else rendered + "\n")
+
+    def _print_others_row(self, ref_row: Row | None, others_num: int, others_count: int):
+        """
+        Aggregated row for the groups omitted because of '--top' and
+        '--min-*' options. The count column is rendered as usual, the name
+        column is replaced with a label, and the rest of the columns are
+        left blank, but keep the widths of the ones in `ref_row`.
+        """
+        label = f"({others_num} other{'s' if others_num > 1 else ''})"
+        cells = []
+        seen = set()
+        for attr in self._opt.columns:
+            first_of_type = attr not in seen
+            seen.add(attr)
+            col = self._table.get(attr)
+            view = get_view(attr)
+            if attr == Attribute.COUNT:
+                rendered = pt.joine(
+                    view.get_sep_before(col, COLUMN_SEPARATOR),
+                    view.render_others(self._opt, col, self._groups, others_count),
+                    view.get_sep_after(col, COLUMN_SEPARATOR),
+                )
+            elif attr == Attribute.NAME and label:
+                rendered, label = pt.joine(view.get_sep_before(col, COLUMN_SEPARATOR), label), ""
+            elif ref_row:
+                ref_cell = self._render_cell(ref_row, attr, first_of_type)
+                rendered = pt.pad(sum(map(pt.guess_char_width, pt.apply_filters(ref_cell, pt.SgrStringReplacer()))))
+            else:
+                rendered = ""
+            cells.append(rendered)
+        self._output.write("".join(cells).rstrip() + (f" {label}" if label else "") + "\n")
+
+    def _render_row(self, row: Row) -> str:
+        widths = tuple(col.max_width for col in self._table.values())
+        template = self._get_row_template(row.char, row.dup_count, widths)
+        return "".join(p if isinstance(p, str) else self._render_cell(row, *p) for p in template)
+
+    def _get_row_template(self, char: Char, dup_count: int, widths: tuple[int, ...]) -> tuple[str | tuple, ...]:
+        key = (char, dup_count, widths)
+        if (template := self._row_templates.get(key)) is not None:
+            self._row_templates_info.hits += 1
+            return template
+
+        self._row_templates_info.misses += 1
+        if len(self._row_templates) >= self._row_templates_info.maxsize:
+            self._row_templates.clear()
+        template = self._row_templates[key] = self._make_row_template(char, dup_count)
+        self._row_templates_info.currsize = max(self._row_templates_info.currsize, len(self._row_templates))
+        return template
+
+    def _make_row_template(self, char: Char, dup_count: int) -> tuple[str | tuple, ...]:
+        """
+        Pre-render all the columns of a row except the ones which change with
+        every row (OFFSET, INDEX) and are kept as (attr, first) placeholders.
+        Rendered columns also depend on current column widths, which are the
+        part of the cache key for that reason.
+        """
+        row = Row(char, 0, 0, dup_count)
+        template = []
+        static = []
+        seen = set()
+        for attr in self._opt.columns:
+            first_of_type = attr not in seen
+            seen.add(attr)
+            if attr in self._ADDRESS_ATTRS:
+                template.append("".join(static))
+                template.append((attr, first_of_type))
+                static.clear()
+                continue
+            static.append(self._render_cell(row, attr, first_of_type))
+        template.append("".join(static))
+        return tuple(filter(None, template))
+
+    def _render_cell(self, row: Row, attr: Attribute, first_of_type: bool) -> str:
+        view = get_view(attr)
+        col = self._table.get(attr)
+        return pt.joine(
+            view.get_sep_before(col, COLUMN_SEPARATOR),
+            view.render(self._opt, row, col, self._groups, first_of_type),
+            view.get_sep_after(col, COLUMN_SEPARATOR),
+        )
 
     def _update_columns(self, row: Row = None):
         for attr in self._opt.columns:
@@ -250,18 +598,22 @@ class CliWriter:
 
 class RendersAddress:
     @classmethod
-    def _format_address(cls, row: Row, prefix: str, val_str: str):
-        suffix = [" ", "+"][row.dup_count > 0]
-        _, zeros, nonzeros = re.split("^([0 ]*)(?=.)", val_str)
-        return prefix, zeros, nonzeros + suffix
+    def _render_address(cls, row: Row, prefix: str, digits: str, fill: str, width: int) -> str:
+        """
+        Padding (leading zeros or spaces, which are rendered dimmed) is
+        everything except the significant digits, and its length follows from
+        the column width; only the value itself is formatted per row.
+        """
+        padding = fill * (width - len(digits))  # empty if the value is wider
+        return cls._render_template(prefix, row.dup_count > 0) % (padding, digits)
 
     @staticmethod
-    @lru_cache(maxsize=1)
-    def _render_template() -> str:
+    @lru_cache(maxsize=8)
+    def _render_template(prefix: str, merged: bool) -> str:
         text = pt.Text(
-            ("%s", Styles.INDEX_PREFIX),
+            (prefix, Styles.INDEX_PREFIX),
             ("%s", Styles.INDEX_ZEROS),
-            ("%s", Styles.INDEX),
+            ("%s" + [" ", "+"][merged], Styles.INDEX),
         )
         return pt.render(text) + COLUMN_SEPARATOR
 
@@ -295,9 +647,9 @@ class OffsetView(IView, RendersAddress):
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group:
             return ""
-        pfx = [" ", "⏨"][opt.decimal_offset]
-        address_parts = self._format_address(row, pfx, self.format(opt, row, col))
-        return self._render_template() % address_parts
+        if opt.decimal_offset:
+            return self._render_address(row, "⏨", str(row.offset), " ", col.max_width)
+        return self._render_address(row, " ", f"{row.offset:x}", "0", col.max_width)
 
 
 class IndexView(IView, RendersAddress):
@@ -313,8 +665,7 @@ class IndexView(IView, RendersAddress):
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group:
             return ""
-        address_parts = self._format_address(row, "#", self.format(opt, row, col))
-        return self._render_template() % address_parts
+        return self._render_address(row, "#", str(row.index), " ", col.max_width)
 
 
 class RawView(IView):
@@ -322,32 +673,34 @@ class RawView(IView):
     def attr() -> Attribute:
         return Attribute.RAW
 
+    PREFIX = " 0x "
+
     def format(self, opt: Options, row: Row, col: Column = None) -> str:
         if not row or not row.char:
             return ""
-        return self._format_bytes(opt.rigid, (*row.raw_bytes,), col.max_width if col else 0)
+        max_width = max((col.max_width if col else 0), 2)
+        return f"{self._format_bytes(opt.rigid, (*row.raw_bytes,)):>{max_width}s}"
 
     @lru_cache(maxsize=256)
-    def _format_bytes(self, rigid: bool, raw_bytes: tuple[int, ...], max_width=0):
-        max_width = max(max_width, 2)
+    def _format_bytes(self, rigid: bool, raw_bytes: tuple[int, ...]) -> str:
         str_bytes = [f"{b:02x}" for b in raw_bytes]
         sep = ["", " "][len(raw_bytes) < 4 or rigid]
-        return f"{sep.join(str_bytes):>{max_width}s}"
+        return sep.join(str_bytes)
 
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group_cats:
             return ""
-        formatted = self.format(opt, row, col).strip()
-        return self._render_bytes(opt.rigid, formatted, col.max_width)
+        formatted = self._format_bytes(opt.rigid, (*row.raw_bytes,)) if row.char else ""
+        max_col_width = min([9, 14][opt.rigid], col.max_width + len(self.PREFIX))
+        return self._render_prefix(max_col_width - len(formatted)) + self._render_bytes(formatted) + COLUMN_SEPARATOR
 
-    @lru_cache(maxsize=256)
-    def _render_bytes(self, rigid: bool, formatted: str, max_width=0):
-        prefix = " 0x "
+    @lru_cache(maxsize=16)
+    def _render_prefix(self, width: int) -> str:
+        return pt.render(pt.fit(self.PREFIX, width, "<", overflow=""), Styles.RAW_PREFIX)
 
-        max_col_width = min([9, 14][rigid], max_width + len(prefix))
-        prefix = pt.fit(prefix, max_col_width - len(formatted), "<", overflow="")
-        txt = pt.Text(prefix, Styles.RAW_PREFIX, formatted, Styles.RAW)
-        return pt.render(txt) + COLUMN_SEPARATOR
+    @lru_cache(maxsize=256)
+    def _render_bytes(self, formatted: str) -> str:
+        return pt.render(formatted, Styles.RAW)
 
 
 class CpNumberView(IView):
@@ -358,38 +711,30 @@ class CpNumberView(IView):
         return Attribute.NUMBER
 
     def format(self, opt: Options, row: Row, col: Column = None) -> str:
-        if not row:
-            return ""
-        return self._format_char(row.char, col.max_width if col else 0)
-
-    @lru_cache(maxsize=256)
-    def _format_char(self, char: Char | None, max_width=0) -> str:
-        if not char or char.is_invalid:
+        if not row or not row.char or row.char.is_invalid:
             return ""
-        max_width = max(max_width, 2)
-        return f"{char.cpnum:>{max_width}X}"
+        max_width = max((col.max_width if col else 0), 2)
+        return f"{row.char.cpnum:>{max_width}X}"
 
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group_cats:
             return ""
-        max_width = col.max_width if col else 0
-        return self._render_char(opt.rigid, row.char, max_width)
-
-    @lru_cache(maxsize=256)
-    def _render_char(self, _rigid: bool, char: Char, max_width=0) -> str:
-        prefix = self.PREFIX
-        result_st = pt.NOOP_STYLE
-
-        if char.is_invalid:
-            result = " -- "
-            prefix = "  "
-            result_st = Styles.INVALID
+        if row.char.is_invalid:
+            prefix, result = "  ", " -- "
         else:
-            result = self._format_char(char, max_width).strip()
+            prefix, result = self.PREFIX, f"{row.char.cpnum:X}"
+
+        max_col_width = min([6, 8][opt.rigid], (col.max_width if col else 0) + len(prefix))
+        rendered_prefix = self._render_prefix(prefix, max_col_width - len(result))
+        return rendered_prefix + self._render_char(result, row.char.is_invalid) + COLUMN_SEPARATOR
 
-        max_col_width = min([6, 8][_rigid], max_width + len(prefix))
-        prefix = pt.fit(prefix, max_col_width - len(result), "<", overflow="")
-        return pt.render(pt.Text(prefix, Styles.CPNUM_PREFIX, result, result_st)) + COLUMN_SEPARATOR
+    @lru_cache(maxsize=16)
+    def _render_prefix(self, prefix: str, width: int) -> str:
+        return pt.render(pt.fit(prefix, width, "<", overflow=""), Styles.CPNUM_PREFIX)
+
+    @lru_cache(maxsize=256)
+    def _render_char(self, result: str, is_invalid: bool) -> str:
+        return pt.render(result, Styles.INVALID if is_invalid else pt.NOOP_STYLE)
 
 
 class CountView(IView):
@@ -421,23 +766,30 @@ class CountView(IView):
             result = scale_str + result
         return result
 
-    @lru_cache(maxsize=512)
+    def render_others(self, opt: Options, col: Column, grp: Groups, count: int) -> str:
+        val_str = pt.fit(str(count), col.max_width, ">")
+        scale_str = self._render_scale(opt.group_cats, None, count - 1, grp.max, grp.sum)
+        return scale_str + self._render_count(True, val_str, "×")
+
     def _render_count(self, group: bool, formatted: str, suffix: str) -> str:
         if not formatted.strip() and not group:
-            result = pt.pad(len(formatted) + 1)
-        else:
-            result = pt.render(pt.highlight(formatted)) + suffix
-        return result + COLUMN_SEPARATOR
+            return pt.pad(len(formatted) + 1) + COLUMN_SEPARATOR
+        value = formatted.lstrip()
+        return pt.pad(len(formatted) - len(value)) + self._render_value(value, suffix)
 
     @lru_cache(maxsize=512)
-    def _render_scale(self, group_cats: bool, cat: str, count: int, max: int, sum: int) -> str:
-        scale_st = resolve_cat_style(cat)
+    def _render_value(self, value: str, suffix: str) -> str:
+        return pt.render(pt.highlight(value)) + suffix + COLUMN_SEPARATOR
+
+    @lru_cache(maxsize=512)
+    def _render_scale(self, group_cats: bool, cat: str | None, count: int, max: int, sum: int) -> str:
+        scale_st = resolve_cat_style(cat) if cat else CategoryStyles.BASE
         if scale_st.bg:
             scale_st = pt.Style(fg=scale_st.bg)
         scale_width = self._get_scale_width(group_cats)
         scale_label = format_ratio((count + 1) / sum)
         scale = Scale(
-            (count + 1) / max,
+            min(1.0, (count + 1) / max),
             pt.NOOP_STYLE,
             scale_st,
             scale_width,
@@ -484,7 +836,7 @@ class CharView(IView):
                 return value
             if char.is_surrogate or char.is_invalid:
                 value = CHAR_PLACEHOLDER
-            pad = " " * bool(unicodedata.combining(value))
+            pad = " " * char.is_combining
             return pt.render(pad + value, cat_st)
 
         pad = ""
@@ -497,7 +849,7 @@ class CharView(IView):
             value = CHAR_PLACEHOLDER
         else:
             val_len = pt.get_char_width(value, block=False)
-            if unicodedata.combining(value):
+            if char.is_combining:
                 pad = " "
                 val_len += 1
 
@@ -525,25 +877,22 @@ class NameView(IView):
             ccpg = "01"[row.char.is_ascii_c1]
             notation = cc.alt if opt.alt_cc else cc.abbr
             full_name = f"ASCII C{ccpg} [{notation}] {full_name}"
-        return self._format_name(full_name, col.max_width if col else 0)
-
-    @lru_cache(maxsize=256)
-    def _format_name(self, name: str, max_width=0):
-        max_width = max(max_width, 16)
-        return f"{name:{max_width}s}"
+        max_width = max((col.max_width if col else 0), 16)
+        return f"{full_name:{max_width}s}"
 
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group_cats or not row.char:
             return ""
         formatted = self.format(opt, row, col)
-        return self._render_name(formatted, row.char.is_invalid)
-
-    @lru_cache(maxsize=256)
-    def _render_name(self, formatted: str, is_invalid: bool):
-        if is_invalid:
-            return pt.render(formatted, Styles.INVALID)
+        if row.char.is_invalid:
+            return self._render_invalid_template() % formatted
         return formatted
 
+    @staticmethod
+    @lru_cache(maxsize=1)
+    def _render_invalid_template() -> str:
+        return pt.render("%s", Styles.INVALID)
+
 
 class CatView(IView, Expands):
     def __init__(self, *args):
@@ -575,7 +924,9 @@ class CatView(IView, Expands):
         if not self._use_long_form(opt, first):
             return self._render_cat_abbr(cat)
         formatted = self.format(opt, row, col)
-        return self._render_cat(opt.rigid, formatted, cat)
+        if opt.rigid:
+            return self._render_cat_template(cat) % formatted
+        return self._render_cat(formatted.strip(), cat)
 
     @lru_cache(maxsize=64)
     def _render_cat_abbr(self, cat: str) -> str:
@@ -586,11 +937,12 @@ class CatView(IView, Expands):
         return prefix + pt.render(cat, st)
 
     @lru_cache(maxsize=64)
-    def _render_cat(self, _rigid: bool, formatted: str, cat: str):
-        st = resolve_cat_style(cat)
-        if not _rigid:
-            formatted = pt.fit(formatted.strip(), 16, align=self._default_align)
-        return pt.render(formatted, st)
+    def _render_cat(self, cat_name: str, cat: str):
+        return pt.render(pt.fit(cat_name, 16, align=self._default_align), resolve_cat_style(cat))
+
+    @lru_cache(maxsize=64)
+    def _render_cat_template(self, cat: str) -> str:
+        return pt.render("%s", resolve_cat_style(cat))
 
 
 class BlockView(IView, Expands):
@@ -605,21 +957,22 @@ class BlockView(IView, Expands):
     def format(self, opt: Options, row: Row, col: Column = None) -> str:
         if not row or not row.char or not opt.names:
             return ""
-        block = row.char.block
-        return self._format_block(block.name if block else None, col.max_width if col else 0)
-
-    @lru_cache(maxsize=256)
-    def _format_block(self, block_name: str | None, max_width=0) -> str:
-        max_width = max(max_width, 2)
-        return f"{(block_name or Char.NO_VALUE):{self.get_align()}{max_width}s}"
+        max_width = max((col.max_width if col else 0), 2)
+        return f"{self._get_block_name(row.char.block):{self.get_align()}{max_width}s}"
 
     def render(self, opt: Options, row: Row, col: Column = None, grp: Groups = None, first=True) -> str:
         if opt.group_cats or not row.char:
             return ""
+        block = row.char.block
         if not self._use_long_form(opt, first):
-            return self._render_block_abbr(row.char.block)
-        formatted = self.format(opt, row, col)
-        return self._render_block(opt._rigid, formatted, row.char.block is not None, self.get_align(col))
+            return self._render_block_abbr(block)
+        if opt.rigid:
+            return self._render_block_template(block is not None) % self.format(opt, row, col) + COLUMN_SEPARATOR
+        return self._render_block(self._get_block_name(block), block is not None, self.get_align(col))
+
+    @staticmethod
+    def _get_block_name(block: UnicodeBlock | None) -> str:
+        return block.name if block else Char.NO_VALUE
 
     @lru_cache(maxsize=256)
     def _render_block_abbr(self, block: UnicodeBlock | None) -> str:
@@ -631,9 +984,11 @@ class BlockView(IView, Expands):
         return pt.render(pt.fit(s, 5, "<"), st)
 
     @lru_cache(maxsize=256)
-    def _render_block(self, _rigid: bool, formatted: str, block_defined: bool, align: pt.Align):
-        if not _rigid:
-            formatted = pt.fit(formatted.strip(), 16, align)
+    def _render_block(self, block_name: str, block_defined: bool, align: pt.Align):
+        st = (Styles.INVALID, Styles.PLAIN)[block_defined]
+        return pt.render(pt.fit(block_name, 16, align), st) + COLUMN_SEPARATOR
 
+    @lru_cache(maxsize=2)
+    def _render_block_template(self, block_defined: bool) -> str:
         st = (Styles.INVALID, Styles.PLAIN)[block_defined]
-        return pt.render(formatted, st) + COLUMN_SEPARATOR
+        return pt.render("%s", st)
@@ -14,3 +14,7 @@ from .uccat import get_max_cat_name_length
 from .uccat import get_categories
 from .uccat import get_super_categories
 from .uccat import UnicodeCategory
+from .ucprop import CpFlag
+from .ucprop import get_props
+from .ucstat import get_block_stats
+from .ucstat import BlockStats
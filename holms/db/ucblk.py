@@ -3,9 +3,10 @@
 #  (c) 2024 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
 
+import sys
+from array import array
 from bisect import bisect_right
-from functools import lru_cache, cache
-from operator import attrgetter
+from functools import cache
 from typing import TypeVar
 
 import pytermor as pt
@@ -365,12 +366,44 @@ def get_blocks() -> list[UnicodeBlock]:
     return _BLOCKS
 
 
-@lru_cache(maxsize=256)
-def find_block(number: int) -> UnicodeBlock:
-    idx = bisect_right(_BLOCKS, number, key=attrgetter("start"))
-    if idx:
-        block = _BLOCKS[idx - 1]
-        return block
+_PAGE_BITS = 8
+_SPLIT_PAGE = -1
+
+
+@cache
+def _get_block_starts() -> list[int]:
+    return [b.start for b in _BLOCKS]
+
+
+@cache
+def _get_block_pages() -> array:
+    """
+    Block number (see `find_block_num()`) for each 256-code point page, if
+    the whole page belongs to the same block, or `_SPLIT_PAGE` otherwise.
+    """
+    starts = _get_block_starts()
+    pages = array("h")
+    for page_start in range(0, sys.maxunicode + 1, 1 << _PAGE_BITS):
+        first = bisect_right(starts, page_start)
+        last = bisect_right(starts, page_start + (1 << _PAGE_BITS) - 1)
+        pages.append(first if first == last else _SPLIT_PAGE)
+    return pages
+
+
+def find_block_num(number: int) -> int:
+    """
+    :returns: index of the last block starting at or before the code point
+              in `get_blocks()` plus 1, or 0 if there is no such block.
+    """
+    if (block_num := _get_block_pages()[number >> _PAGE_BITS]) == _SPLIT_PAGE:
+        return bisect_right(_get_block_starts(), number)
+    return block_num
+
+
+def find_block(number: int) -> UnicodeBlock | None:
+    if block_num := find_block_num(number):
+        return _BLOCKS[block_num - 1]
+    return None
 
 
 @cache
@@ -0,0 +1,121 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Per-code point property table: category, block and a set of flags packed into
+one 32-bit integer for each of 0x110000 code points. The table is a two-stage
+one: the first stage is indexed by `cp >> 8` and points to a 256-entry page,
+which is computed on first access. Layout of an entry:
+
+    bits  0-5   category id (index in `get_category_list()`)
+    bits  6-15  flags (see `CpFlag`)
+    bits 16-31  block index + 1 (index in `get_blocks()`, 0 = no block)
+"""
+from __future__ import annotations
+
+import sys
+import unicodedata
+from array import array
+from enum import IntFlag
+from functools import cache
+
+from .ucblk import find_block_num, get_blocks, UnicodeBlock
+from .uccat import get_categories
+
+PAGE_BITS = 8
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_NUM = (sys.maxunicode + 1) >> PAGE_BITS
+
+_CAT_MASK = 0x3F
+_FLAGS_SHIFT = 6
+_FLAGS_MASK = 0x3FF
+_BLOCK_SHIFT = 16
+
+
+class CpFlag(IntFlag):
+    ASCII_C0 = 1 << 0
+    ASCII_C1 = 1 << 1
+    ASCII_LETTER = 1 << 2
+    SURROGATE = 1 << 3
+    CONTROL_OR_FORMAT = 1 << 4
+    PRIVATE_USE = 1 << 5
+    UNASSIGNED = 1 << 6
+    SPACE = 1 << 7
+    COMBINING = 1 << 8
+
+
+_pages: list[array | None] = [None] * PAGE_NUM
+
+
+@cache
+def get_category_list() -> list[str]:
+    return sorted(cat.abbr for cat in get_categories() if len(cat.abbr) == 2)
+
+
+@cache
+def _get_category_ids() -> dict[str, int]:
+    return {cat: idx for idx, cat in enumerate(get_category_list())}
+
+
+def _compute_flags(cp: int, c: str, cat: str) -> CpFlag:
+    flags = CpFlag(0)
+    if cp < 0x20 or cp == 0x7F:
+        flags |= CpFlag.ASCII_C0
+    elif 0x80 <= cp < 0xA0:
+        flags |= CpFlag.ASCII_C1
+    elif 0x41 <= cp <= 0x5A or 0x61 <= cp <= 0x7A:
+        flags |= CpFlag.ASCII_LETTER
+    if 0xD800 <= cp <= 0xDFFF:
+        flags |= CpFlag.SURROGATE
+    if cat in ("Cc", "Cf"):
+        flags |= CpFlag.CONTROL_OR_FORMAT
+    elif cat == "Co":
+        flags |= CpFlag.PRIVATE_USE
+    elif cat == "Cn":
+        flags |= CpFlag.UNASSIGNED
+    if c.isspace():
+        flags |= CpFlag.SPACE
+    if unicodedata.combining(c):
+        flags |= CpFlag.COMBINING
+    return flags
+
+
+def _build_page(page_idx: int) -> array:
+    cat_ids = _get_category_ids()
+    page = array("I", bytes(4 * PAGE_SIZE))
+
+    start = page_idx << PAGE_BITS
+    for cp in range(start, start + PAGE_SIZE):
+        c = chr(cp)
+        cat = unicodedata.category(c)
+        block_num = find_block_num(cp)
+        flags = _compute_flags(cp, c, cat)
+        page[cp - start] = cat_ids[cat] | (flags << _FLAGS_SHIFT) | (block_num << _BLOCK_SHIFT)
+
+    _pages[page_idx] = page
+    return page
+
+
+def get_props(cp: int) -> int:
+    """:returns: packed properties of a code point, see the module docstring."""
+    page = _pages[cp >> PAGE_BITS] or _build_page(cp >> PAGE_BITS)
+    return page[cp & (PAGE_SIZE - 1)]
+
+
+def get_page(page_idx: int) -> array:
+    return _pages[page_idx] or _build_page(page_idx)
+
+
+def unpack_category(props: int) -> str:
+    return get_category_list()[props & _CAT_MASK]
+
+
+def unpack_flags(props: int) -> CpFlag:
+    return CpFlag((props >> _FLAGS_SHIFT) & _FLAGS_MASK)
+
+
+def unpack_block(props: int) -> UnicodeBlock | None:
+    if block_num := props >> _BLOCK_SHIFT:
+        return get_blocks()[block_num - 1]
+    return None
@@ -0,0 +1,93 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Per-block statistics for the legend: the number of assigned code points and
+the categories present in each block. Counting them is a pass over ~300K code
+points, so the results are stored in the user cache directory and reused for
+as long as the Unicode database (which comes with the interpreter) and the
+list of blocks stay the same.
+"""
+from __future__ import annotations
+
+import os
+import unicodedata
+from dataclasses import dataclass
+from functools import cache
+
+from .ucblk import get_blocks, UnicodeBlock
+
+
+@dataclass(frozen=True)
+class BlockStats:
+    assigned: int
+    unassigned: int
+    cats: dict[str, str]
+    """ Super categories present in the block → one of their categories (the last met one). """
+
+
+def get_cache_path() -> str:
+    from holms import APP_NAME
+
+    cache_dir = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(cache_dir, APP_NAME, f"block-stats-{unicodedata.unidata_version}.json")
+
+
+@cache
+def get_block_stats() -> list[BlockStats]:
+    """:returns: statistics for each block of `get_blocks()`, in the same order."""
+    from holms.shared import logger
+
+    path = get_cache_path()
+    if (stats := _load(path)) is not None:
+        return stats
+
+    stats = [_compute(block) for block in get_blocks()]
+    try:
+        _save(path, stats)
+    except OSError as e:
+        logger(require=False).debug(f"Failed to save block stats to {path}: {e}")
+    return stats
+
+
+def _compute(block: UnicodeBlock) -> BlockStats:
+    assigned = 0
+    cats = dict()
+    for cp in range(block.start, block.end + 1):
+        cat = unicodedata.category(chr(cp))
+        if cat != "Cn":
+            assigned += 1
+            cats[cat[0]] = cat
+    return BlockStats(assigned, block.end + 1 - block.start - assigned, cats)
+
+
+def _get_ranges() -> list[list[int]]:
+    return [[b.start, b.end] for b in get_blocks()]
+
+
+def _load(path: str) -> list[BlockStats] | None:
+    import json
+
+    try:
+        with open(path, "rt") as f:
+            data = json.load(f)
+        if data["ranges"] != _get_ranges():
+            return None  # blocks have been updated since
+        return [BlockStats(*s) for s in data["stats"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _save(path: str, stats: list[BlockStats]):
+    import json
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        "ranges": _get_ranges(),
+        "stats": [[s.assigned, s.unassigned, s.cats] for s in stats],
+    }
+    tmp_path = f"{path}.{os.getpid()}"
+    with open(tmp_path, "wt") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)  # concurrent runs should not see a partial file
@@ -4,4 +4,5 @@
 # ------------------------------------------------------------------------------
 
 from .log import logger
+from .perf import profiler
 from .util import CacheInfo
@@ -0,0 +1,253 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Stage-level profiling ('--profile', '-vv'). Instrumentation points wrap the
+functions and iterators of each stage once, when the stage is set up, and
+only if the profiler is enabled, so there is no overhead otherwise. Stage
+times are exclusive: time spent in a nested stage (e.g. decoding called
+from within the iteration over the chars) is subtracted from the outer one.
+
+Optionally the whole run is recorded by cProfile or by a call stack
+collector for flame graphs ('--profile-out').
+"""
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import threading
+import time
+import typing as t
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass
+
+if t.TYPE_CHECKING:
+    from .util import CacheInfo
+
+STAGES = ["read", "decode", "chars", "group", "columns", "render", "output"]
+_STAGE_UNITS = {"read": "B", "columns": "rows", "render": "rows"}
+_COLLAPSED_EXTS = (".folded", ".collapsed")
+
+_T = t.TypeVar("_T")
+
+
+@dataclass
+class StageStats:
+    time_ns: int = 0
+    calls: int = 0
+    items: int = 0
+
+
+class Profiler:
+    def __init__(self, output_path: str = None):
+        self._ts_start = time.perf_counter_ns()
+        self._stats: dict[str, StageStats] = {name: StageStats() for name in STAGES}
+        self._caches: dict[str, CacheInfo] = dict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+        self._output_path = output_path
+        self._recorder: _StackCollector | t.Any | None = None
+        if output_path:
+            if output_path.endswith(_COLLAPSED_EXTS):
+                self._recorder = _StackCollector()
+            else:
+                import cProfile
+
+                self._recorder = cProfile.Profile()
+            self._recorder.enable()
+
+    def wrap(self, stage: str, fn: Callable[..., _T], count: Callable[[_T], int] = None) -> Callable[..., _T]:
+        """
+        :param count: function that returns the number of items processed
+                      by the call, given its result; 1 item per call if omitted.
+        """
+
+        def _wrapper(*args, **kwargs) -> _T:
+            stack = self._get_stack()
+            stack.append(0)
+            start = time.perf_counter_ns()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                self._account(stack, stage, start)
+            self._stats[stage].items += count(result) if count else 1
+            return result
+
+        return _wrapper
+
+    def iterate(self, stage: str, iterable: Iterable[_T], count: Callable[[_T], int] = None) -> Iterator[_T]:
+        """Same as `wrap()`, but measures the time spent in each `next()` call."""
+        iterator = iter(iterable)
+        next_fn = self.wrap(stage, iterator.__next__, count)
+        while True:
+            try:
+                yield next_fn()
+            except StopIteration:
+                return
+
+    def add_cache(self, origin: str, info: CacheInfo):
+        """Called on shutdown of the caches; view caches keep cumulative stats, so the last ones win."""
+        self._caches[" ".join(origin.split())] = info
+
+    def get_stats(self) -> dict[str, StageStats]:
+        return self._stats
+
+    def report(self, file: t.TextIO = None):
+        gc.collect()  # finalizers print the cache stats, and the wrappers make reference cycles
+        elapsed_ns = time.perf_counter_ns() - self._ts_start
+        file = file or sys.stderr
+        if not any(st.calls for st in self._stats.values()):
+            return  # failed before processing anything
+
+        print(f"{'STAGE':<8s} {'TIME':>10s} {'SHARE':>6s} {'CALLS':>9s} {'ITEMS':>11s} {'ITEMS/S':>13s}", file=file)
+        for name, st in self._stats.items():
+            if not st.calls:
+                continue
+            unit = _STAGE_UNITS.get(name, "ch")
+            rate = f"{_format_si(st.items / st.time_ns * 1e9)}{unit}/s" if st.time_ns else "-"
+            print(
+                f"{name:<8s} {st.time_ns / 1e6:>8.1f}ms {st.time_ns / elapsed_ns:>6.1%} {st.calls:>9d} "
+                f"{_format_si(st.items) + unit:>11s} {rate:>13s}",
+                file=file,
+            )
+
+        read_bytes = self._stats["read"].items
+        summary = [f"Total {elapsed_ns / 1e9:.3f}s"]
+        if read_bytes:
+            summary.append(f"{_format_si(read_bytes)}B read at {_format_si(read_bytes / elapsed_ns * 1e9)}B/s")
+        if rss := _get_peak_rss():
+            summary.append(f"peak RSS {_format_si(rss)}B")
+        print(", ".join(summary), file=file)
+
+        caches = [(o, c) for o, c in self._caches.items() if c.hits or c.misses]
+        if caches:
+            print(f"{'CACHE':<36s} {'HIT RATIO':>9s} {'HITS':>9s} {'MISSES':>9s} {'SIZE':>11s}", file=file)
+        for origin, info in caches:
+            ratio = info.hits / (info.hits + info.misses)
+            print(
+                f"{origin:<36s} {ratio:>9.1%} {info.hits:>9d} {info.misses:>9d} "
+                f"{info.currsize:>5d}/{info.maxsize:<5d}",
+                file=file,
+            )
+        file.flush()
+
+    def close(self):
+        if not self._recorder:
+            return
+        self._recorder.disable()
+        if isinstance(self._recorder, _StackCollector):
+            self._recorder.dump(self._output_path)
+        else:
+            self._recorder.dump_stats(self._output_path)
+        self._recorder = None
+
+    def _get_stack(self) -> list[int]:
+        try:
+            return self._local.stack
+        except AttributeError:
+            self._local.stack = []
+            return self._local.stack
+
+    def _account(self, stack: list[int], stage: str, start: int):
+        elapsed = time.perf_counter_ns() - start
+        nested = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        st = self._stats[stage]
+        with self._lock:
+            st.time_ns += elapsed - nested
+            st.calls += 1
+
+
+class _StackCollector:
+    """
+    Records the time spent in each distinct call stack of the main thread in
+    collapsed stack format ('outer;inner;innermost <microseconds>' lines),
+    which is an input for flame graph generators, e.g. 'flamegraph.pl'.
+    """
+
+    def __init__(self):
+        self._paths: list[str] = []
+        self._times: Counter[str] = Counter()
+        self._last = 0
+
+    def enable(self):
+        frames = []
+        frame = sys._getframe()
+        while frame:
+            frames.append(frame)
+            frame = frame.f_back
+        for frame in reversed(frames):  # the stack the collector is enabled in; this frame is the first to return
+            self._push(self._get_label(frame.f_code))
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self)
+
+    def disable(self):
+        sys.setprofile(None)
+
+    def __call__(self, frame, event: str, arg):
+        now = time.perf_counter_ns()
+        if self._paths:
+            self._times[self._paths[-1]] += now - self._last
+        if event == "call":
+            self._push(self._get_label(frame.f_code))
+        elif event == "c_call":
+            self._push(getattr(arg, "__qualname__", None) or repr(arg))
+        elif self._paths:  # return, c_return, c_exception
+            self._paths.pop()
+        self._last = time.perf_counter_ns()
+
+    @staticmethod
+    def _get_label(code) -> str:
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+    def _push(self, label: str):
+        self._paths.append(f"{self._paths[-1]};{label}" if self._paths else label)
+
+    def dump(self, path: str):
+        with open(path, "wt") as f:
+            for stack, time_ns in self._times.items():
+                if time_us := time_ns // 1000:
+                    f.write(f"{stack} {time_us}\n")
+
+
+def _format_si(value: float) -> str:
+    for prefix in ("", "k", "M", "G"):
+        if abs(value) < 1000:
+            return f"{value:.3g}{prefix}" if prefix or value % 1 else f"{value:.0f}"
+        value /= 1000
+    return f"{value:.3g}T"
+
+
+def _get_peak_rss() -> int | None:
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+_profiler: Profiler | None = None
+
+
+def init_profile(enabled: bool, output_path: str = None):
+    global _profiler
+    if enabled or output_path:
+        _profiler = Profiler(output_path)
+
+
+def destroy_profile():
+    global _profiler
+    if _profiler:
+        _profiler.close()
+    _profiler = None
+
+
+def profiler() -> Profiler | None:
+    """:returns: current profiler or None if profiling is disabled."""
+    return _profiler
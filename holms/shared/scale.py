@@ -7,7 +7,6 @@ from math import floor
 
 import pytermor as pt
 
-from es7s_commons.strutil import to_superscript
 
 FULL_BLOCK = "█"
 
@@ -59,6 +58,8 @@ def format_ratio(ratio: float):
     if ratio_str == "0.0":
         ratio_str = "e-2"
     if "e" in ratio_str:
+        from es7s_commons.strutil import to_superscript  # rarely needed, slow to import
+
         base, exp, power = ratio_str.partition("e")
         ratio_str = base + "10" + to_superscript(power)
     return f"{ratio_str:>4s}%"
@@ -5,7 +5,7 @@
 from __future__ import annotations
 from dataclasses import dataclass
 import pytermor as pt
-from . import logger
+from . import logger, profiler
 
 
 @dataclass
@@ -25,6 +25,8 @@ class CacheInfo:
         return self
 
     def debug(self, origin: str):
+        if prof := profiler():
+            prof.add_cache(origin, self)
         resets_str = f"{self.resets:>2d}"
         hits_str = f"{self.hits:>6d}"
         misses_str = f"{self.misses:>6d}"
@@ -62,4 +64,4 @@ class CacheInfo:
             (f"{misses_str:>6s} misses{sep}", misses_st or st),
             (f"{size_str:>4s}/{self.maxsize:4d} size", size_st or st),
         ]
-        logger().debug(pt.render(pt.Text(*frags)))
+        logger(require=False).debug(pt.render(pt.Text(*frags)))
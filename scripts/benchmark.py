@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Benchmark suite: runs the application in a separate process for each
+combination of input file and mode, measures wall time and peak memory
+usage (RSS), and stores the results as JSON, optionally comparing them with
+the results of a previous run.
+
+Inputs: misc/UTF-8-demo.txt, tests/data/*.txt, holms/data/all-cats.bin and
+full Unicode dumps (unicode.bin, unicode_oneline.bin), which are made by
+'scripts/98-generate-data.py' in a temporary directory unless they are
+already present in DATA_PATH.
+
+Usage: scripts/benchmark.py [-o OUTPUT.json] [-c PREVIOUS.json] [-r REPEAT]
+                            [-k SUBSTRING] [--quick] [--data-path DATA_PATH]
+"""
+import argparse
+import datetime
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from holms import APP_VERSION
+from holms.core.reader import SurrogateAwareDecoder
+
+MODES = {
+    "buffered": ["run", "-b"],
+    "unbuffered": ["run", "-u"],
+    "merge": ["run", "-b", "-m"],
+    "group": ["run", "-g"],
+    "group-cats": ["run", "-gg"],
+    "group-supercats": ["run", "-ggg"],
+    "no-table": ["run", "--no-table"],
+}
+UNICODE_INPUTS = ["unicode.bin", "unicode_oneline.bin"]
+
+
+class _Main:
+    def __init__(self, args: argparse.Namespace):
+        self._args = args
+        self._tmp_dir: tempfile.TemporaryDirectory | None = None
+        self._previous = dict()
+        if args.compare:
+            with open(args.compare) as f:
+                self._previous = {r["name"]: r for r in json.load(f)["results"]}
+
+    def run(self):
+        results = []
+        try:
+            for name, cmd_args, input_path in self._get_cases():
+                results.append(result := self._measure(name, cmd_args, input_path))
+                self._print_result(result)
+        finally:
+            if self._tmp_dir:
+                self._tmp_dir.cleanup()
+
+        report = {
+            "timestamp": datetime.datetime.now().astimezone().isoformat(timespec="seconds"),
+            "version": APP_VERSION,
+            "commit": self._get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": self._args.repeat,
+            "results": results,
+        }
+        if self._args.output:
+            with open(self._args.output, "wt") as f:
+                json.dump(report, f, indent=2)
+            print(f"Results saved to {self._args.output}", file=sys.stderr)
+        else:
+            json.dump(report, sys.stdout, indent=2)
+
+    def _get_cases(self):
+        inputs = [
+            os.path.join(ROOT_PATH, "misc", "UTF-8-demo.txt"),
+            *sorted(glob.glob(os.path.join(ROOT_PATH, "tests", "data", "*.txt"))),
+            os.path.join(ROOT_PATH, "holms", "data", "all-cats.bin"),
+        ]
+        if not self._args.quick:
+            inputs.extend(UNICODE_INPUTS)
+
+        cases = [(f"{mode}:{os.path.basename(i)}", args, i) for i in inputs for mode, args in MODES.items()]
+        cases.append(("legend", ["legend"], None))
+        for name, cmd_args, input_path in cases:
+            if self._args.k and self._args.k not in name:
+                continue
+            if input_path in UNICODE_INPUTS:
+                input_path = os.path.join(self._get_unicode_data_path(), input_path)
+            yield name, cmd_args, input_path
+
+    def _get_unicode_data_path(self) -> str:
+        data_path = self._args.data_path
+        if all(os.path.isfile(os.path.join(data_path, f)) for f in UNICODE_INPUTS):
+            return data_path
+        if not self._tmp_dir:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="holms-bench-")
+            print(f"Generating full Unicode dumps in {self._tmp_dir.name}", file=sys.stderr)
+            script_path = os.path.join(ROOT_PATH, "scripts", "98-generate-data.py")
+            subprocess.run([sys.executable, script_path, self._tmp_dir.name], check=True)
+        return self._tmp_dir.name
+
+    def _measure(self, name: str, cmd_args: list[str], input_path: str | None) -> dict:
+        args = [sys.executable, "-m", "holms", "--no-color", *cmd_args]
+        if input_path:
+            args.append(input_path)
+
+        times, peak_rss = [], 0
+        for _ in range(self._args.repeat):
+            ts_start = time.perf_counter()
+            proc = subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, cwd=ROOT_PATH)
+            _, status, rusage = os.wait4(proc.pid, 0)
+            times.append(time.perf_counter() - ts_start)
+            proc.returncode = os.waitstatus_to_exitcode(status)
+            if proc.returncode != 0:
+                raise RuntimeError(f"{name}: exit code {proc.returncode}: {' '.join(args)}")
+            peak_rss = max(peak_rss, rusage.ru_maxrss)
+
+        size, chars = self._get_input_size(input_path)
+        time_min = min(times)
+        return {
+            "name": name,
+            "args": cmd_args,
+            "input": os.path.basename(input_path) if input_path else None,
+            "bytes": size,
+            "chars": chars,
+            "time_min": round(time_min, 4),
+            "time_median": round(statistics.median(times), 4),
+            "mb_per_s": round(size / time_min / 1e6, 3) if size else None,
+            "chars_per_s": round(chars / time_min) if chars else None,
+            "peak_rss_mb": round(peak_rss * self._get_rss_unit() / 2**20, 1),
+        }
+
+    @staticmethod
+    def _get_input_size(input_path: str | None) -> tuple[int, int]:
+        if not input_path:
+            return 0, 0
+        with open(input_path, "rb") as f:
+            data = f.read()
+        dec = SurrogateAwareDecoder()
+        return len(data), sum(map(len, dec.decode_runs(data, True)))
+
+    @staticmethod
+    def _get_rss_unit() -> int:
+        return 1 if sys.platform == "darwin" else 1024  # bytes on macOS, kilobytes elsewhere
+
+    @staticmethod
+    def _get_commit() -> str | None:
+        try:
+            result = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True, check=True
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
+
+    def _print_result(self, result: dict):
+        line = f"{result['name']:<40s} {result['time_min']:8.3f}s {result['peak_rss_mb']:7.1f}M"
+        if result["mb_per_s"] is not None:
+            line += f" {result['mb_per_s']:9.3f}MB/s {result['chars_per_s']:>10d}ch/s"
+        if prev := self._previous.get(result["name"]):
+            line += f"  x{prev['time_min'] / result['time_min']:.2f} speed"
+            line += f"  {result['peak_rss_mb'] - prev['peak_rss_mb']:+.1f}M"
+        print(line, file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("-o", "--output", help="save the results to OUTPUT instead of printing them")
+    parser.add_argument("-c", "--compare", metavar="PREVIOUS", help="compare with the results of a previous run")
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="run each case REPEAT times [default: 3]")
+    parser.add_argument("-k", metavar="SUBSTRING", help="run only the cases with SUBSTRING in the name")
+    parser.add_argument("--quick", action="store_true", help="skip full Unicode dumps (the slowest cases)")
+    parser.add_argument("--data-path", default=os.path.join(ROOT_PATH, "misc"), help="[default: ./misc]")
+    _Main(parser.parse_args()).run()
@@ -0,0 +1,42 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""Reference decoding and input generation shared by the reader and stream tests."""
+import io
+import random
+from codecs import BufferedIncrementalDecoder
+
+
+class _LegacyDecoder(BufferedIncrementalDecoder):
+    def __init__(self):
+        super().__init__(errors="surrogatepass")
+
+    def _buffer_decode(self, input, errors, final):
+        try:
+            return input.decode(errors=errors), len(input)
+        except UnicodeDecodeError as e:
+            if e.start == 0:
+                return bytes((input[0],)), 1
+            return input[: e.start].decode(errors=errors), e.start
+
+
+def read_legacy(data: bytes) -> list:
+    """Reference implementation: the original 4-byte read loop."""
+    buf, inp, result = _LegacyDecoder(), io.BytesIO(data), []
+    while b := inp.read(4):
+        result.extend(buf.decode(b))
+    while buf.getstate()[0]:
+        result.extend(buf.decode(b"", True))
+    return result
+
+
+def random_bytes(seed: int, length: int = 4096) -> bytes:
+    rnd = random.Random(seed)
+    parts = []
+    while sum(map(len, parts)) < length:
+        if rnd.randint(0, 9):
+            parts.append(chr(rnd.randint(0, 0x10FFFF)).encode(errors="surrogatepass"))
+        else:
+            parts.append(rnd.randbytes(rnd.randint(1, 3)))
+    return b"".join(parts)
@@ -0,0 +1,169 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import sys
+import unicodedata
+from bisect import bisect_right
+
+import pytest
+
+from holms.core import Char, Groups, get_char
+from holms.core.char import CHAR_POOL_SIZE, Repeat
+from holms.db import get_blocks
+from holms.db.ucprop import CpFlag, get_props, unpack_block, unpack_category, unpack_flags
+
+
+class TestCharPool:
+    def test_shared_instance(self):
+        assert get_char("я") is get_char("я")
+        assert get_char("я") == Char("я")
+
+    def test_invalid_bytes_kept_separate(self):
+        assert get_char("\x80") is not get_char(b"\x80")
+        assert get_char(b"\x80").is_invalid
+        assert not get_char("\x80").is_invalid
+        assert get_char(0x80) is get_char(b"\x80")
+
+    def test_immutable(self):
+        char = get_char("a")
+        with pytest.raises(AttributeError):
+            char.value = "b"
+        with pytest.raises(AttributeError):
+            char.extra = 1
+
+    def test_bounded(self):
+        for cp in range(0x4E00, 0x4E00 + 2 * CHAR_POOL_SIZE):
+            get_char(chr(cp))
+        assert get_char.cache_info().currsize <= CHAR_POOL_SIZE
+
+
+class TestParseRepeats:
+    def test_repeats(self):
+        runs = ["abbb\n\n", b"\x80", b"\x80", "\U0010FFFF\U0010FFFFc"]
+        assert [*Char.parse_repeats(runs)] == [
+            get_char("a"),
+            Repeat(get_char("b"), 3),
+            Repeat(get_char("\n"), 2),
+            get_char(0x80),
+            get_char(0x80),
+            Repeat(get_char("\U0010FFFF"), 2),
+            get_char("c"),
+            None,
+        ]
+
+    def test_no_repeats(self):
+        assert [*Char.parse_repeats(["abc"])] == [*Char.parse("abc")]
+
+
+class TestPropertyTable:
+    @pytest.mark.parametrize("start", [0, 0x80, 0x300, 0xD700, 0xE000, 0x1F300, 0x2FA00, 0x10FF00])
+    def test_props(self, start: int):
+        starts = [b.start for b in get_blocks()]
+        for cp in range(start, min(start + 0x200, sys.maxunicode + 1)):
+            c = chr(cp)
+            props = get_props(cp)
+            block_idx = bisect_right(starts, cp) - 1
+
+            assert unpack_category(props) == unicodedata.category(c)
+            assert unpack_block(props) is (get_blocks()[block_idx] if block_idx >= 0 else None)
+            assert (CpFlag.SPACE in unpack_flags(props)) == c.isspace()
+            assert (CpFlag.COMBINING in unpack_flags(props)) == bool(unicodedata.combining(c))
+
+    def test_find_block(self):
+        from holms.db import find_block
+
+        starts = [b.start for b in get_blocks()]
+        edges = {cp + d for b in get_blocks() for cp in (b.start, b.end) for d in (-1, 0, 1)}
+        for cp in sorted(edges | {*range(0, sys.maxunicode + 1, 0x80)}):
+            if not 0 <= cp <= sys.maxunicode:
+                continue
+            block_idx = bisect_right(starts, cp) - 1
+            assert find_block(cp) is (get_blocks()[block_idx] if block_idx >= 0 else None)
+
+    @pytest.mark.parametrize(
+        "c, attrs",
+        [
+            ("\x00", {"is_ascii_c0", "is_ascii_cc", "is_control_or_format", "should_print_placeholder"}),
+            ("\x85", {"is_ascii_c1", "is_ascii_cc", "is_control_or_format", "should_print_placeholder"}),
+            ("Z", {"is_ascii_letter"}),
+            (" ", {"should_print_placeholder"}),
+            ("\u0301", {"is_combining"}),
+            ("\ud800", {"is_surrogate", "should_print_placeholder"}),
+            ("\ue000", {"is_private_use"}),
+            ("\U000E0080", {"is_unassigned"}),
+            (b"\xff", {"is_invalid", "should_print_placeholder"}),
+        ],
+    )
+    def test_char_flags(self, c: str | bytes, attrs: set[str]):
+        char = Char(c)
+        flags = {a for a in Char.__slots__ if a.startswith(("is_", "should_")) and getattr(char, a)}
+        assert flags == attrs
+
+
+class TestBlockStats:
+    @pytest.fixture(scope="function", autouse=True)
+    def cache_dir(self, tmp_path, monkeypatch):
+        from holms.db import get_block_stats
+
+        monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+        get_block_stats.cache_clear()
+        yield tmp_path
+        get_block_stats.cache_clear()
+
+    def test_stats(self):
+        from holms.db import get_block_stats
+
+        stats = dict(zip((b.abbr for b in get_blocks()), get_block_stats()))
+        assert (stats["BaL"].assigned, stats["BaL"].unassigned) == (128, 0)
+        assert set(stats["BaL"].cats.keys()) == {"C", "L", "N", "P", "S", "Z"}
+        assert stats["PUAᵇ"].cats == {"C": "Co"}
+        assert sum(s.assigned + s.unassigned for s in stats.values()) == sum(b.end + 1 - b.start for b in get_blocks())
+
+    def test_cached(self):
+        import json
+        from holms.db import get_block_stats
+        from holms.db.ucstat import get_cache_path
+
+        expected = get_block_stats()
+        with open(get_cache_path()) as f:
+            data = json.load(f)
+        data["stats"][0][0] = -1
+        with open(get_cache_path(), "w") as f:
+            json.dump(data, f)
+
+        get_block_stats.cache_clear()
+        assert get_block_stats()[0].assigned == -1
+
+        data["ranges"][0][1] += 1  # blocks have changed
+        with open(get_cache_path(), "w") as f:
+            json.dump(data, f)
+        get_block_stats.cache_clear()
+        assert get_block_stats() == expected
+
+    def test_cache_not_writable(self, cache_dir):
+        from holms.db import get_block_stats
+
+        (cache_dir / "holms").write_text("")
+        assert get_block_stats()[0].assigned == 128
+
+
+class TestGroups:
+    @pytest.fixture(scope="class")
+    def groups(self) -> Groups:
+        return Groups({"a": 3, "b": 1, "c": 5, "d": 3, "e": 1, "f": 7})
+
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({}, "fcadbe"),
+            ({"top": 3}, "fca"),
+            ({"top": 10}, "fcadbe"),
+            ({"min_count": 3}, "fcad"),
+            ({"min_ratio": 25}, "fc"),
+            ({"top": 1, "min_count": 3}, "f"),
+        ],
+    )
+    def test_select(self, groups: Groups, kwargs: dict, expected: str):
+        assert "".join(k for k, _ in groups.select(**kwargs)) == expected
+        assert groups.select(**kwargs) == groups.sorted()[: len(expected)]
@@ -2,6 +2,7 @@
 #  es7s/holms
 #  (c) 2023 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
+import os
 import re
 from collections.abc import Iterable
 from pathlib import Path
@@ -249,6 +250,22 @@ class TestRunCommand:
             ignore_ws=True,
         )
 
+    @pytest.mark.parametrize(
+        "opts",
+        [["--top", "1"], ["--min-count", "7"], ["--min-ratio", "50"], ["--top", "2", "--min-ratio", "50"]],
+    )
+    def test_group_limit(self, crun: CliRunner, ep: CliCommand, opts: list[str]):
+        s = "a" * 9 + "Щ" + "a" * 7 + "!" * 6
+        rs = crun.invoke(ep, ["run", "-g", "-f", "count,number,name", *opts], input=s)
+
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert_streq(
+            rs.stdout,
+            ["69.6%███16×U+61LATINSMALLLETTERA", "30.4%█▎7×(2others)"],
+            ignore_ws=True,
+        )
+
     def test_group_super_cat(self, crun: CliRunner, ep: CliCommand):
         s = "a" * 9 + "Щ" + "a" * 7 + "!" * 6
         rs = crun.invoke(ep, ["run", "-ggg", "-f", "count,cat"], input=s)
@@ -370,3 +387,285 @@ class TestRunCommand:
         assert rs.exit_code == 0
         assert not rs.stderr
         assert_streq(rs.stdout, exp_out)
+
+
+class TestParallelGrouping:
+    @pytest.fixture(scope="function")
+    def filepath_random(self, tmp_path: Path, monkeypatch) -> str:
+        import random
+        from holms.core import parallel
+
+        monkeypatch.setattr(parallel, "_MIN_RANGE_SIZE", 256)
+        rnd = random.Random(0)
+        path = tmp_path / "random.bin"
+        with open(path, "wb") as f:
+            for _ in range(5000):
+                if rnd.randint(0, 20):
+                    cp = rnd.choice([0x0A, 0x20, 0x61, 0x44F, 0x1F451, 0xD800, rnd.randint(0, 0x10FFFF)])
+                    f.write(chr(cp).encode(errors="surrogatepass"))
+                else:
+                    f.write(rnd.randbytes(rnd.randint(1, 3)))
+        return str(path)
+
+    @pytest.mark.parametrize(
+        "opts", [["-g"], ["-gg"], ["-ggg"], ["-g", "--oneline"], ["-gg", "-f", "count,cat,number"]]
+    )
+    def test_same_as_single_process(self, crun: CliRunner, ep: CliCommand, filepath_random: str, opts: list[str]):
+        rs_single = crun.invoke(ep, ["-c", "run", *opts, filepath_random])
+        rs_parallel = crun.invoke(ep, ["-c", "run", *opts, "-j", "4", filepath_random])
+        assert rs_parallel.exit_code == 0
+        assert not rs_parallel.stderr
+        assert rs_parallel.stdout == rs_single.stdout
+
+
+class TestOutputFormat:
+    INPUT = "aa\n".encode() + b"\xff" + "д".encode()
+
+    def test_ndjson(self, crun: CliRunner, ep: CliCommand):
+        import json
+
+        rs = crun.invoke(ep, ["-c", "run", "-O", "ndjson", "-m", "-f", "offset,raw,char,cat,count"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert [*map(json.loads, rs.stdout.splitlines())] == [
+            {"offset": 0, "raw": "61", "char": "a", "cat": "Ll", "count": 2},
+            {"offset": 2, "raw": "0a", "char": "\n", "cat": "Cc", "count": 1},
+            {"offset": 3, "raw": "ff", "char": None, "cat": None, "count": 1},
+            {"offset": 4, "raw": "d0b4", "char": "д", "cat": "Ll", "count": 1},
+        ]
+
+    @pytest.mark.parametrize("fmt, sep", [("csv", ","), ("tsv", "\t")])
+    def test_csv(self, crun: CliRunner, ep: CliCommand, fmt: str, sep: str):
+        rs = crun.invoke(ep, ["-c", "run", "-O", fmt, "-gg", "-f", "count,cat,name"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        expected = [("count", "cat", "name"), ("3", "Ll", ""), ("1", "Cc", ""), ("1", "", "")]
+        assert rs.stdout.splitlines() == [sep.join(r) for r in expected]
+
+    def test_group_limit(self, crun: CliRunner, ep: CliCommand):
+        import json
+
+        s = "a" * 9 + "Щ" + "a" * 7 + "!" * 6
+        rs = crun.invoke(ep, ["run", "-O", "ndjson", "-g", "-f", "count,char", "--top", "1"], input=s)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert [*map(json.loads, rs.stdout.splitlines())] == [
+            {"count": 16, "char": "a"},
+            {"count": 7, "char": None},
+        ]
+
+    def test_group_limit_csv(self, crun: CliRunner, ep: CliCommand):
+        rs = crun.invoke(ep, ["run", "-O", "csv", "-gg", "-f", "cat,count", "--min-count", "2"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert rs.stdout.splitlines() == ["cat,count", "Ll,3", ",2"]
+
+    def test_group_limit_binary(self, crun: CliRunner, ep: CliCommand):
+        from holms.core.sink import BinarySink
+
+        rs = crun.invoke(ep, ["run", "-O", "binary", "-g", "--top", "1"], input=self.INPUT)
+        assert rs.exit_code == 0
+        records = [*BinarySink.RECORD.iter_unpack(rs.stdout_bytes)]
+        assert records[-1] == (0, 0, 3, BinarySink.OTHERS_CP)
+        assert sum(r[2] for r in records) == 5
+
+    def test_binary(self, crun: CliRunner, ep: CliCommand):
+        from holms.core.sink import BinarySink
+
+        rs = crun.invoke(ep, ["-c", "run", "-O", "binary"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert [*BinarySink.RECORD.iter_unpack(rs.stdout_bytes)] == [
+            (0, 0, 1, 0x61),
+            (1, 1, 1, 0x61),
+            (2, 2, 1, 0x0A),
+            (3, 3, 1, 0xFF | 1 << 31),
+            (4, 4, 1, 0x434),
+        ]
+
+
+class TestFilters:
+    @pytest.mark.parametrize("buffered", ["-b", "-u"])
+    def test_true_offsets(self, crun: CliRunner, ep: CliCommand, buffered: str):
+        s = "ab​c\xffdеф​​h"
+        rs = crun.invoke(ep, ["run", buffered, "-m", "--only-cat", "Cf", "-f", "offset,index,count,number"], input=s)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        lines = ["".join(line.split()).lstrip("0") for line in rs.stdout.splitlines()]
+        assert lines == ["2#2U+200B", "d+#8+2×U+200B"]
+
+
+class TestScanCommand:
+    @pytest.fixture(scope="function")
+    def tree(self, tmp_path: Path) -> Path:
+        (tmp_path / "sub").mkdir()
+        (tmp_path / ".git").mkdir()
+        (tmp_path / "a.py").write_text('x = "a​b"\n')
+        (tmp_path / "sub" / "b.txt").write_text("ok\n")
+        (tmp_path / "sub" / "c.py").write_text("q‮evil\n")
+        (tmp_path / "sub" / "d.bin").write_bytes("bin\0​".encode())
+        (tmp_path / ".git" / "x").write_text("​")
+        return tmp_path
+
+    def test_walk(self, tree: Path):
+        from holms.core.scan import walk
+
+        assert [*walk([str(tree)])] == [str(tree / p) for p in ["a.py", "sub/b.txt", "sub/c.py"]]
+        assert [*walk([str(tree)], [".git", "sub"], skip_binary=False)] == [str(tree / "a.py")]
+        assert [*walk([str(tree / "sub" / "d.bin")])] == [str(tree / "sub" / "d.bin")]
+
+    @pytest.mark.parametrize("jobs", ["1", "2"])
+    def test_table(self, crun: CliRunner, ep: CliCommand, tree: Path, jobs: str):
+        rs = crun.invoke(ep, ["scan", "-j", jobs, "--only-cat", "Cf", "-f", "offset,number", str(tree)])
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        lines = ["".join(line.split()) for line in rs.stdout.splitlines()]
+        assert lines[:4] == [f"{tree}/a.py:6U+200B", f"{tree}/sub/c.py:1U+202E", "", "Summary(3files):"]
+        assert [line[:6] for line in lines[4:]] == ["U+200B", "U+202E"]
+
+    def test_ndjson(self, crun: CliRunner, ep: CliCommand, tree: Path):
+        import json
+
+        rs = crun.invoke(ep, ["scan", "-O", "ndjson", "--no-summary", "--only-cat", "Cf", "-f", "number", str(tree)])
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert [*map(json.loads, rs.stdout.splitlines())] == [
+            {"path": str(tree / "a.py"), "number": 0x200B},
+            {"path": str(tree / "sub" / "c.py"), "number": 0x202E},
+        ]
+
+
+class TestProfile:
+    INPUT = "aa\n\xff​д"
+
+    @pytest.mark.parametrize(
+        "args, stages",
+        [
+            (["run", "-b"], ["read", "decode", "chars", "columns", "render", "output"]),
+            (["run", "-u"], ["read", "decode", "chars", "columns", "render", "output"]),
+            (["run", "-g"], ["read", "decode", "group", "columns", "render", "output"]),
+            (["run", "--only-cat", "Cf"], ["read", "decode", "chars", "columns", "render", "output"]),
+            (["run", "-O", "ndjson"], ["read", "decode", "chars", "render", "output"]),
+        ],
+        ids=str,
+    )
+    def test_stages(self, crun: CliRunner, ep: CliCommand, args: list[str], stages: list[str]):
+        expected = crun.invoke(ep, args, input=self.INPUT)
+        rs = crun.invoke(ep, ["--profile", *args], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert rs.stdout == expected.stdout
+        assert [line.split()[0] for line in rs.stderr.splitlines()[1 : len(stages) + 1]] == stages
+        assert re.search(r"^Total .+ read at .+, peak RSS", rs.stderr, re.MULTILINE)
+
+    def test_verbose_twice(self, crun: CliRunner, ep: CliCommand):
+        rs = crun.invoke(ep, ["-vv", "run"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert re.search(r"^chars +[\d.]+ms .+ 6ch ", rs.stderr, re.MULTILINE)
+
+    def test_not_enabled(self, crun: CliRunner, ep: CliCommand):
+        rs = crun.invoke(ep, ["-v", "run"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert "STAGE" not in rs.stderr
+
+    def test_out_pstats(self, crun: CliRunner, ep: CliCommand, tmp_path: Path):
+        import pstats
+
+        path = tmp_path / "holms.prof"
+        rs = crun.invoke(ep, ["--profile-out", str(path), "run"], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert "STAGE" in rs.stderr
+        stats = pstats.Stats(str(path))
+        assert any(fn == "invoke_run" for _, _, fn in stats.stats.keys())
+
+    def test_out_collapsed(self, crun: CliRunner, ep: CliCommand, tmp_path: Path):
+        path = tmp_path / "holms.folded"
+        rs = crun.invoke(ep, ["--profile-out", str(path), "run"], input=self.INPUT)
+        assert rs.exit_code == 0
+        lines = path.read_text().splitlines()
+        assert all(re.fullmatch(r"\S.*? \d+", line) for line in lines)
+        assert any(re.search(r";invoke_run \(run\.py:\d+\);", line) for line in lines)
+
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory) -> str:
+    import subprocess
+    import sys
+    import time
+
+    path = str(tmp_path_factory.mktemp("serve") / "holms.sock")
+    proc = subprocess.Popen([sys.executable, "-m", "holms", "serve", "-s", path])
+    for _ in range(100):
+        if Path(path).exists():
+            break
+        time.sleep(0.05)
+    yield path
+    proc.terminate()
+    assert proc.wait(timeout=5) == 0
+    assert not Path(path).exists()
+
+
+class TestServeCommand:
+    INPUT = "aa\n".encode() + b"\xff" + "д‮".encode()
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["-c", "run"],
+            ["-C", "run", "-u"],
+            ["-c", "run", "-gg"],
+            ["run", "-O", "ndjson", "-m", "--range", "U+0-U+7F"],
+            ["run", "-O", "binary", "--only-cat", "Cf,Ll"],
+        ],
+        ids=str,
+    )
+    def test_same_output(self, crun: CliRunner, ep: CliCommand, socket_path: str, args: list[str]):
+        expected = crun.invoke(ep, args, input=self.INPUT)
+        rs = crun.invoke(ep, [*args, "--via-socket", socket_path], input=self.INPUT)
+        assert rs.exit_code == 0
+        assert not rs.stderr
+        assert rs.stdout_bytes == expected.stdout_bytes
+
+    def test_env_socket_path(self, crun: CliRunner, ep: CliCommand, socket_path: str):
+        rs = crun.invoke(ep, ["run", "-f", "number"], input="a", env={"HOLMS_SOCKET": socket_path})
+        assert rs.exit_code == 0
+        assert "".join(rs.stdout.split()) == "U+61"
+
+    def test_request_error(self, socket_path: str):
+        import io
+        from holms.core.server import send_request
+
+        output, error = io.BytesIO(), io.BytesIO()
+        exit_code = send_request(socket_path, {"bogus": 1}, False, "no_ansi", io.BytesIO(b"a"), output, error)
+        assert exit_code == 1
+        assert not output.getvalue()
+        assert b"bogus" in error.getvalue()
+
+    def test_no_server(self, crun: CliRunner, ep: CliCommand, tmp_path: Path):
+        rs = crun.invoke(ep, ["run", "--via-socket", str(tmp_path / "none.sock")], input="a")
+        assert rs.exit_code == 1
+        assert "Server is not running" in rs.stderr
+
+    def test_not_a_socket(self, crun: CliRunner, ep: CliCommand, tmp_path: Path):
+        path = tmp_path / "file.txt"
+        path.write_text("data")
+        rs = crun.invoke(ep, ["serve", "-s", str(path)])
+        assert rs.exit_code == 1
+        assert "not a socket" in rs.stderr
+        assert path.read_text() == "data"
+
+    def test_already_running(self, crun: CliRunner, ep: CliCommand, socket_path: str):
+        rs = crun.invoke(ep, ["serve", "-s", socket_path])
+        assert rs.exit_code == 1
+        assert "already running" in rs.stderr
+        assert crun.invoke(ep, ["run", "--via-socket", socket_path], input="a").exit_code == 0
+
+    def test_stale_socket(self, tmp_path: Path):
+        import socket
+        import stat
+        from holms.core.server import Server
+
+        path = str(tmp_path / "holms.sock")
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.bind(path)  # left behind after close
+        with Server(path):
+            assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+        assert not os.path.exists(path)
@@ -0,0 +1,28 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import io
+
+import pytest
+
+from holms.core import Char, Options
+from holms.core.counter import count_runs
+from holms.core.reader import SurrogateAwareDecoder
+from holms.core.writer import CliWriter
+
+INPUT = "aaa\n\x00\x85яЯЯ👑\U0010FFFF\n bb́".encode() + b"\xff\xc0a\xed\xa0\x80"
+
+
+@pytest.mark.parametrize("group_level", [1, 2, 3])
+@pytest.mark.parametrize("oneline", [False, True])
+def test_same_as_char_counting(group_level: int, oneline: bool):
+    opt = Options(group_level=group_level, oneline=oneline)
+    dec = SurrogateAwareDecoder()
+    runs = [*dec.decode_runs(INPUT, True)]
+    expected = CliWriter(opt, True, io.StringIO()).count(Char.parse(c for run in runs for c in run))
+
+    groups, cat_cache, stats = count_runs(runs, opt)
+    assert [*groups.items()] == [*expected[0].items()]
+    assert [*cat_cache.items()] == [*expected[1].items()]
+    assert stats == expected[2]
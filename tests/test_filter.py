@@ -0,0 +1,54 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import unicodedata
+
+import pytest
+
+from holms.core import Char
+from holms.core.filter import CpFilter, Gap
+from holms.db import find_block
+
+INPUT = ["ab​c", b"\xff", "dеф\U0001F451g​​h"]
+
+
+class TestCpFilter:
+    @pytest.mark.parametrize(
+        "kwargs, check",
+        [
+            ({"cats": ["Cf"]}, lambda c: unicodedata.category(c) == "Cf"),
+            ({"cats": ["L"]}, lambda c: unicodedata.category(c).startswith("L")),
+            ({"blocks": ["Cyrillic"]}, lambda c: 0x400 <= ord(c) <= 0x4FF),
+            ({"blocks": ["BaL"], "exclude_ascii": True}, lambda c: False),
+            ({"cp_range": (0x100, 0x20000)}, lambda c: 0x100 <= ord(c) <= 0x20000),
+            ({"exclude_ascii": True}, lambda c: ord(c) >= 0x80),
+            ({"invalid_only": True}, lambda c: False),
+        ],
+    )
+    def test_accepts(self, kwargs: dict, check):
+        flt = CpFilter(**kwargs)
+        for cp in [*range(0x300), *range(0x1F300, 0x1F500), 0xE0001, 0x10FFFF]:
+            assert flt.accepts(chr(cp)) == check(chr(cp)), hex(cp)
+
+    def test_block_gap_not_accepted(self):
+        block = find_block(0x2FE0)  # unassigned range right after the block
+        assert block.end < 0x2FE0
+        assert not CpFilter(blocks=[block.name]).accepts("⿠")
+
+    @pytest.mark.parametrize(
+        "kwargs, expected",
+        [
+            ({"cats": ["Cf"]}, [Gap(2, 2), "​", Gap(12, 7), "​", "​", Gap(1, 1)]),
+            ({"invalid_only": True}, [Gap(6, 4), b"\xff", Gap(17, 8)]),
+            (
+                {"exclude_ascii": True},
+                [Gap(2, 2), "​", Gap(1, 1), b"\xff", Gap(1, 1), "е", "ф", "\U0001F451", Gap(1, 1), "​", "​", Gap(1, 1)],
+            ),
+        ],
+    )
+    def test_parse(self, kwargs: dict, expected: list):
+        result = [*CpFilter(**kwargs).parse(INPUT)]
+        assert result.pop() is None
+        assert [r if isinstance(r, Gap) else r.value for r in result] == expected
+        assert all(isinstance(r, (Gap, Char)) for r in result)
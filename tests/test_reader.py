@@ -0,0 +1,69 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import io
+from pathlib import Path
+
+import pytest
+
+from holms.core import Options
+from holms.core.reader import CliReader, SurrogateAwareDecoder
+from helpers import random_bytes, read_legacy
+
+DATA_PATH = Path(__file__).parent / "data"
+
+
+def _read(data: bytes, chunk_size: int = None) -> list:
+    reader = CliReader(Options(), io.TextIOWrapper(io.BytesIO(data)))
+    if chunk_size:
+        reader._CHUNK_SIZE = chunk_size
+    return [*reader.read()]
+
+
+def _read_file(path: Path, chunk_size: int = None) -> list:
+    reader = CliReader(Options(), io.TextIOWrapper(open(path, "rb")))
+    if chunk_size:
+        reader._CHUNK_SIZE = chunk_size
+    return [*reader.read()]
+
+
+class TestReader:
+    # fmt: off
+    @pytest.mark.parametrize("data", [
+        b"",
+        b"abc",
+        "яяЯЯ👑".encode(),
+        b"\xf0\x9f\x91",
+        b"a\xed\xa0\x80b",
+        b"\x80\xff\xfe\xc2",
+        b"\xf0\x9f\x91a\xf0\x9f",
+        *(random_bytes(seed) for seed in range(8)),
+    ])
+    # fmt: on
+    @pytest.mark.parametrize("chunk_size", [1, 3, 5, 64, None])
+    def test_chunks_equal_to_legacy(self, data: bytes, chunk_size: int):
+        assert _read(data, chunk_size) == read_legacy(data)
+
+    @pytest.mark.parametrize("filename", ["ascii.txt", "broken-utf8.txt", "chars.txt", "confusables.txt"])
+    @pytest.mark.parametrize("chunk_size", [7, None])
+    def test_mmap_equal_to_legacy(self, filename: str, chunk_size: int):
+        path = DATA_PATH / filename
+        assert _read_file(path, chunk_size) == read_legacy(path.read_bytes())
+
+
+class TestDecoder:
+    @pytest.mark.parametrize("min_window", [4, 5, 64])
+    @pytest.mark.parametrize("seed", range(4))
+    def test_runs(self, min_window: int, seed: int):
+        data = random_bytes(seed) + b"\xff" * 100 + "ы".encode() * 100
+        dec = SurrogateAwareDecoder()
+        dec._MIN_WINDOW = min_window
+        runs = [*dec.decode_runs(data[:1000]), *dec.decode_runs(data[1000:], True)]
+
+        assert all(len(r) == 1 for r in runs if isinstance(r, bytes))
+        assert [c for r in runs for c in r] == read_legacy(data)
+
+    def test_valid_input_is_one_run(self):
+        data = "яЯ👑\ud800".encode(errors="surrogatepass") * 1000
+        assert [*SurrogateAwareDecoder().decode_runs(data, True)] == [data.decode(errors="surrogatepass")]
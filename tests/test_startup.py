@@ -0,0 +1,74 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+"""
+Cold start benchmark based on `python -X importtime`. Absolute import times
+depend on the machine, so the budget is relative to the import time of the
+libraries that cannot be avoided (click and pytermor), measured in the same
+environment (plus asyncio for unbuffered mode, which is built upon it). The
+best of several attempts is taken to reduce the noise.
+"""
+import re
+import subprocess
+import sys
+
+import pytest
+
+ATTEMPTS = 3
+BUDGET_RATIO = 2.0
+
+_IMPORTTIME_REGEX = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$", re.MULTILINE)
+
+
+def _importtime(*args: str, input: bytes = b"") -> dict[str, int]:
+    """:returns: cumulative import time (us) of top-level imports by module name."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        input=input,
+        capture_output=True,
+        check=True,
+    )
+    return {
+        m.group(4): int(m.group(2))
+        for m in _IMPORTTIME_REGEX.finditer(result.stderr.decode())
+        if len(m.group(3)) == 1
+    }
+
+
+def _best_total(*args: str, input: bytes = b"") -> int:
+    return min(sum(_importtime(*args, input=input).values()) for _ in range(ATTEMPTS))
+
+
+@pytest.mark.parametrize(
+    "args, input, base_imports",
+    [
+        (["run", "-"], b"abc", "click, pytermor, asyncio"),
+        (["run", "-g", "-"], b"abc", "click, pytermor"),
+        (["version"], b"", "click, pytermor"),
+        (["format"], b"", "click, pytermor"),
+    ],
+)
+def test_startup_time(args: list[str], input: bytes, base_imports: str):
+    base = _best_total("-c", f"import {base_imports}")
+    total = _best_total("-m", "holms", *args, input=input)
+    assert total <= base * BUDGET_RATIO, f"{total/1e3:.1f}ms > {BUDGET_RATIO} x {base/1e3:.1f}ms"
+
+
+@pytest.mark.parametrize(
+    "args, unexpected",
+    [
+        (["run", "-"], ["multiprocessing", "tempfile", "es7s_commons", "holms.cmd.legend"]),
+        (["run", "-g", "-"], ["multiprocessing", "concurrent.futures", "asyncio", "holms.core.stream"]),
+        (["version"], ["holms.core.writer", "holms.db", "holms.cmd.run"]),
+    ],
+)
+def test_no_unneeded_imports(args: list[str], unexpected: list[str]):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "holms", *args],
+        input=b"abc",
+        capture_output=True,
+        check=True,
+    )
+    imported = {m.group(4) for m in _IMPORTTIME_REGEX.finditer(result.stderr.decode())}
+    assert not imported.intersection(unexpected)
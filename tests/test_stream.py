@@ -0,0 +1,101 @@
+# ------------------------------------------------------------------------------
+#  es7s/holms
+#  (c) 2024 A. Shavykin <0.delameter@gmail.com>
+# ------------------------------------------------------------------------------
+import io
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from holms.core import Attribute, Char, Options, OutputFormat
+from holms.core.reader import CliReader
+from holms.core.stream import StreamPipeline
+from holms.core.writer import CliWriter
+from helpers import random_bytes, read_legacy
+
+INPUT = "aaa\n\x00\x85яЯЯЯ👑\U0010FFFF\n bb́​​c".encode() + b"\xff\xc0a\xed\xa0\x80" * 3 + b"zzz"
+
+
+def _feed_pipe(data: bytes, piece: int) -> io.BufferedReader:
+    """Make a pipe which gets `data` written in pieces with pauses between them."""
+    rfd, wfd = os.pipe()
+
+    def _write():
+        with os.fdopen(wfd, "wb", buffering=0) as fp:
+            for pos in range(0, len(data), piece):
+                fp.write(data[pos : pos + piece])
+                time.sleep(0.001)
+
+    threading.Thread(target=_write, daemon=True).start()
+    return os.fdopen(rfd, "rb")
+
+
+@pytest.mark.parametrize("piece", [1, 3, 1024])
+@pytest.mark.parametrize(
+    "opt",
+    [
+        Options(),
+        Options(_merge=True, all_columns=True),
+        Options(_merge=True, oneline=True, only_cats=("Cf", "Ll")),
+        Options(output_format=OutputFormat.NDJSON, _merge=True),
+        Options(output_format=OutputFormat.BINARY, exclude_ascii=True),
+    ],
+    ids=["default", "merge", "filter", "ndjson", "binary"],
+)
+def test_same_as_sync_writer(opt: Options, piece: int):
+    binary = opt.output_format == OutputFormat.BINARY
+    expected, actual = [io.BytesIO() if binary else io.StringIO() for _ in range(2)]
+    CliWriter(opt, False, expected).write(CliReader(opt, io.TextIOWrapper(io.BytesIO(INPUT))).parse())
+
+    stats = StreamPipeline(opt, _feed_pipe(INPUT, piece), actual).run()
+    assert actual.getvalue() == expected.getvalue()
+    assert stats.proc_bytes == len(INPUT)
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_decoding_equal_to_legacy(seed: int):
+    data = random_bytes(seed)
+    opt = Options(_columns=[Attribute.OFFSET, Attribute.RAW, Attribute.NUMBER])
+    expected, actual = io.StringIO(), io.StringIO()
+    CliWriter(opt, False, expected).write(Char.parse(read_legacy(data)))
+
+    StreamPipeline(opt, _feed_pipe(data, 4), actual).run()
+    assert actual.getvalue() == expected.getvalue()
+
+
+def test_follow(tmp_path: Path):
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"ab")
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "holms", "run", "--follow", "-f", "offset,number", str(path)],
+        stdout=subprocess.PIPE,
+    )
+
+    def _read_lines(num: int) -> list[str]:
+        return ["".join(proc.stdout.readline().decode().split()) for _ in range(num)]
+
+    try:
+        assert _read_lines(2) == ["0000U+61", "0001U+62"]
+        with open(path, "ab") as fp:
+            fp.write("д".encode() + b"\xff")
+        assert _read_lines(2) == ["0002U+434", "0004--"]
+    finally:
+        proc.send_signal(signal.SIGINT)
+    assert proc.wait(timeout=5) == 0
+
+
+def test_follow_incompatible_with_group(tmp_path: Path):
+    from click.testing import CliRunner
+    from holms.cli.entrypoint import entrypoint__
+
+    path = tmp_path / "input.txt"
+    path.write_bytes(b"ab")
+    rs = CliRunner(mix_stderr=False).invoke(entrypoint__, ["run", "-F", "-g", str(path)])
+    assert rs.exit_code == 2
+    assert "--follow" in rs.stderr
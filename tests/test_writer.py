@@ -2,7 +2,11 @@
 #  es7s/holms
 #  (c) 2023 A. Shavykin <0.delameter@gmail.com>
 # ------------------------------------------------------------------------------
+import io
 import re
+import time
+import tracemalloc
+from collections import deque
 
 import pytermor as pt
 import pytest
@@ -10,7 +14,7 @@ from es7s_commons import Regex
 from pytermor import OutputMode as OM
 
 from holms.core import Char, Attribute, Options
-from holms.core.writer import CliWriter
+from holms.core.writer import CliWriter, OutputBuffer, Row, RowBuffer
 from test_cli import assert_streq
 
 
@@ -140,3 +144,178 @@ class TestFormat:
         opt = Options(_columns=columns, _rigid=rigid)
         CliWriter(opt, buffered).write(Char.parse(map(chr, inp_ints)))
         assert "|".join(map(str.strip, getout(capsys).splitlines() + [""])) == expected_str
+
+
+class TestAddress:
+    # fmt: off
+    @pytest.mark.parametrize("attr, decimal, dup_count, expected", [
+        (Attribute.OFFSET, False, 0, [" 0000  ", " 00ff  ", " 12345  "]),
+        (Attribute.OFFSET, True,  0, ["⏨   0  ", "⏨ 255  ", "⏨74565  "]),
+        (Attribute.INDEX,  False, 1, ["#   0+ ", "# 255+ ", "#74565+ "]),
+    ])
+    # fmt: on
+    def test_render(self, attr, decimal, dup_count, expected):
+        from holms.core.view import get_view
+        from holms.core.writer import Column
+
+        opt = Options(decimal_offset=decimal)
+        col = Column(attr, max_width=4)
+        char = next(iter(Char.parse("a")))
+        rendered = [get_view(attr).render(opt, Row(char, v, v, dup_count), col) for v in (0, 0xFF, 0x12345)]
+        assert [pt.apply_filters(r, pt.SgrStringReplacer()) for r in rendered] == expected
+
+
+class TestRowBuffer:
+    @staticmethod
+    def _measure(buffer, num: int) -> float:
+        char = Char("a")
+        tracemalloc.start()
+        for i in range(num):
+            buffer.append(Row(char, 0x10000000 + i, 0x10000000 + i))
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return current / num
+
+    def test_iter(self):
+        buffer = RowBuffer()
+        rows = [Row(Char("a"), 0, 0, 1), Row(Char(b"\x80"), 2, 2)]
+        for row in rows:
+            buffer.append(row)
+        assert len(buffer) == 2
+        assert [*buffer] == rows
+
+    def test_memory_per_row(self):
+        assert self._measure(RowBuffer(), 10000) <= self._measure(deque(), 10000) / 2
+
+
+class TestTwoPass:
+    # fmt: off
+    @pytest.mark.parametrize("opt", [
+        Options(),
+        Options(all_columns=True, _rigid=True),
+        Options(_merge=True, all_columns=True),
+        Options(_merge=True, decimal_offset=True, _columns=[Attribute.OFFSET, Attribute.INDEX, Attribute.COUNT]),
+        Options(_no_table=True, oneline=True),
+    ])
+    # fmt: on
+    def test_same_as_buffered(self, opt, capsys):
+        s = "aaa\n\x00\x85яЯЯ👑\U0010FFFF\n" * 40 + "b" * 300
+        CliWriter(opt, buffered=True).write(Char.parse(s))
+        expected = capsys.readouterr().out
+        CliWriter(opt, buffered=True).write_two_pass(lambda: Char.parse(s))
+        assert capsys.readouterr().out == expected
+
+
+class TestRepeats:
+    # fmt: off
+    @pytest.mark.parametrize("opt", [
+        Options(_merge=True, all_columns=True),
+        Options(_merge=True, decimal_offset=True, _columns=[Attribute.OFFSET, Attribute.INDEX, Attribute.COUNT]),
+        Options(_merge=True, oneline=True, _columns=[Attribute.OFFSET, Attribute.INDEX, Attribute.COUNT]),
+        Options(_merge=True, _no_table=True, oneline=True),
+    ])
+    # fmt: on
+    def test_same_as_chars(self, opt, buffered, capsys):
+        runs = ["aaa\n\nяЯЯ", "Я", b"\xff", b"\xff", "a\na\n\n" * 3, "  👑👑 " * 3, "b" * 300]
+        CliWriter(opt, buffered).write(Char.parse(c for run in runs for c in run))
+        expected = capsys.readouterr().out
+        CliWriter(opt, buffered).write(Char.parse_repeats(runs))
+        assert capsys.readouterr().out == expected
+
+
+class TestSpill:
+    def test_spill(self):
+        buffer = RowBuffer(limit=10 * RowBuffer.ROW_SIZE)
+        rows = [Row(Char(c), i, i, i % 3) for i, c in enumerate("яЯ👑\x00\ud800" * 7)]
+        rows.append(Row(Char(b"\xff"), 100, 100))
+        for row in rows:
+            buffer.append(row)
+        assert buffer.spilled
+        assert len(buffer) == len(rows)
+        assert [*buffer] == rows
+        assert [*buffer] == rows
+        buffer.close()
+        assert not buffer.spilled
+
+    @pytest.mark.opt(buffer_limit=0, _merge=True, all_columns=True)
+    def test_same_as_in_memory(self, opt, capsys, monkeypatch):
+        s = "aaa\n\x00\x85яЯЯ👑\U0010FFFF\n" * 40
+        CliWriter(opt, buffered=True).write(Char.parse(s))
+        expected = capsys.readouterr().out
+
+        monkeypatch.setattr(RowBuffer, "ROW_SIZE", 1024 * 1024 // 16)
+        w = CliWriter(Options(**{**opt.__getstate__(), "buffer_limit": 1}), buffered=True)
+        w.write(Char.parse(s))
+        assert capsys.readouterr().out == expected
+
+
+class TestRowTemplateCache:
+    @pytest.mark.opt(all_columns=True)
+    def test_hits(self, opt, capsys):
+        w = CliWriter(opt, buffered=True)
+        w.write(Char.parse("ab" * 50))
+        lines = getout(capsys).splitlines()
+
+        assert w._row_templates_info.misses == 2
+        assert w._row_templates_info.hits == 98
+        assert lines[0].split()[0] == "00" and lines[-1].split()[0] == "63"
+
+
+class TestViewCache:
+    def test_kept_on_width_growth(self, capsys):
+        from holms.core.view import get_view
+
+        opt = Options(_columns=[Attribute.OFFSET, Attribute.RAW], _rigid=True)
+        w = CliWriter(opt, buffered=False)
+        view = get_view(Attribute.RAW)
+        view.reset()
+        w.write(Char.parse("a\U0001f600a"))  # 4 bytes do not fit into the default column width
+        lines = getout(capsys).splitlines()
+
+        assert view._render_bytes.cache_info().hits == 1
+        assert len(lines[0]) < len(lines[2])
+
+
+class TestOutputBuffer:
+    def test_size_limit(self):
+        out = io.StringIO()
+        buffer = OutputBuffer(out, size_limit=8)
+        buffer.write("abcd")
+        assert out.getvalue() == ""
+        buffer.write("efgh")
+        assert out.getvalue() == "abcdefgh"
+        buffer.write("ij")
+        buffer.flush()
+        assert out.getvalue() == "abcdefghij"
+
+    def test_interval(self):
+        out = io.StringIO()
+        buffer = OutputBuffer(out, size_limit=1024, interval=0.01)
+        buffer.write("abcd")
+        for _ in range(100):
+            if out.getvalue():
+                break
+            time.sleep(0.01)
+        assert out.getvalue() == "abcd"
+
+    def test_output_flushed(self):
+        class _Output(io.StringIO):
+            flushes = 0
+
+            def flush(self):
+                self.flushes += 1
+                super().flush()
+
+        out = _Output()
+        buffer = OutputBuffer(out, size_limit=4)
+        buffer.write("abcd")
+        assert out.flushes == 1
+        buffer.write("ef")
+        buffer.flush()
+        assert out.flushes == 2
+        assert out.getvalue() == "abcdef"
+
+    def test_unbuffered_writer_flushes_at_exit(self):
+        out = io.StringIO()
+        CliWriter(Options(), buffered=False, output=out).write(Char.parse("ab"))
+        assert len(out.getvalue().splitlines()) == 2